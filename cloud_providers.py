@@ -4,14 +4,158 @@ Módulo para conexión con proveedores de computación cuántica en la nube
 Soporta: IBM Quantum, AWS Braket
 """
 
+import asyncio
+import collections
+import concurrent.futures
 import datetime
-from typing import Dict, Any, Optional, List
+import functools
+import re
+import time
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from enum import Enum
 
+import numpy as np
+
+from model.qc_metadata_model import DeviceMetadata, CalibrationData
+from helpers import format_utc_iso, bitstrings
+
+# Los SDKs de nube (qiskit-ibm-runtime, boto3/Braket, spinqit) se importan bajo demanda en
+# _initialize_service de cada proveedor: importar este módulo no carga ninguno de ellos
+try:
+    from qiskit import transpile
+    from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+    HAS_QISKIT = True
+except ImportError:
+    HAS_QISKIT = False
+    transpile = None
+    generate_preset_pass_manager = None
+
+try:
+    from qiskit_aer import AerSimulator
+    HAS_AER = True
+except ImportError:
+    HAS_AER = False
+    AerSimulator = None
+
+
+def _id_suffix() -> str:
+    """Sufijo único para IDs generados (ns desde epoch; sin colisiones sub-segundo)"""
+    return str(time.time_ns())
+
+
+def _ttl_cached(cache: Dict[str, Tuple[float, Any]], key: str, ttl_seconds: float,
+                fetch_fn: Callable[[], Any], bypass_cache: bool = False) -> Any:
+    """
+    Retorna el valor cacheado para `key` si no ha expirado el TTL,
+    en caso contrario lo obtiene con `fetch_fn` y lo almacena
+    
+    Args:
+        cache: Diccionario de caché (clave -> (timestamp_monotonic, valor))
+        key: Clave del caché (nombre del backend o ARN del dispositivo)
+        ttl_seconds: Tiempo de vida de las entradas en segundos
+        fetch_fn: Función que obtiene el valor desde el proveedor
+        bypass_cache: Forzar la obtención ignorando el caché
+    
+    Returns:
+        Valor cacheado u obtenido
+    """
+    now = time.monotonic()
+    if not bypass_cache and key in cache:
+        timestamp, value = cache[key]
+        if now - timestamp < ttl_seconds:
+            return value
+    
+    value = fetch_fn()
+    cache[key] = (now, value)
+    return value
+
+
+def _ttl_fresh(cache: Dict[str, Tuple[float, Any]], key: str, ttl_seconds: float) -> bool:
+    """Indica si `key` tiene una entrada en `cache` que aún no ha expirado"""
+    entry = cache.get(key)
+    return entry is not None and time.monotonic() - entry[0] < ttl_seconds
+
+
+# Clasificación de tecnología por proveedor: un único regex precompilado
+# por proveedor (una sola pasada sobre el nombre/ARN) y su tabla de mapeo
+_TECH_MAP = {
+    "simulator": "simulator",
+    "qasm": "simulator",
+    "rigetti": "superconducting",
+    "ionq": "ion_trap",
+    "oqc": "superconducting",
+    "iqm": "superconducting",
+    "quera": "neutral_atom",
+}
+
+_ARN_TECH_RE = re.compile(r"(simulator|rigetti|ionq|oqc|iqm|quera)", re.IGNORECASE)
+
+# proveedor -> (patrón, tecnología por defecto)
+_TECHNOLOGY_RULES = {
+    "IBM": (re.compile(r"(simulator|qasm)", re.IGNORECASE), "superconducting"),  # IBM usa principalmente superconductores
+    "AWS": (_ARN_TECH_RE, "unknown"),
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _classify_technology(name: str, provider: str) -> str:
+    """
+    Determina la tecnología del dispositivo a partir de su nombre/ARN
+    
+    Args:
+        name: Nombre del backend o ARN del dispositivo
+        provider: Clave del proveedor en _TECHNOLOGY_RULES ("IBM", "AWS")
+    
+    Returns:
+        Tecnología ("simulator", "superconducting", "ion_trap", ...)
+    """
+    pattern, default = _TECHNOLOGY_RULES[provider]
+    match = pattern.search(name)
+    return _TECH_MAP[match.group(1).lower()] if match else default
+
 # ============================================================
 # IBM QUANTUM
 # ============================================================
 
+# Centinela para sondear atributos opcionales con getattr (None es un valor válido)
+_MISSING = object()
+
+# Factores de conversión a unidades SI para los Nduv de BackendProperties
+_UNIT_SCALE = {
+    "s": 1.0, "ms": 1e-3, "us": 1e-6, "µs": 1e-6, "ns": 1e-9,
+    "Hz": 1.0, "kHz": 1e3, "MHz": 1e6, "GHz": 1e9,
+}
+
+
+# Campos por qubit en CalibrationData: (nombre Nduv, clave de salida, factor)
+_CALIBRATION_QUBIT_FIELDS = (
+    ("T1", "t1_us", 1e6),  # Convertir a microsegundos
+    ("T2", "t2_us", 1e6),
+    ("readout_error", "readout_error", 1),
+)
+
+
+def _qubit_properties_by_index(properties) -> Dict[int, Dict[str, Any]]:
+    """
+    Lee `properties.qubits` una sola vez y construye {qubit: {nombre: valor}}
+    con los valores convertidos a unidades SI (igual que properties.t1(q))
+    
+    Args:
+        properties: BackendProperties de Qiskit
+    
+    Returns:
+        Diccionario de propiedades por qubit
+    """
+    qubits = getattr(properties, 'qubits', None) or []
+    return {
+        i: {
+            n.name: n.value * _UNIT_SCALE.get(getattr(n, 'unit', ''), 1.0)
+            for n in nduvs
+        }
+        for i, nduvs in enumerate(qubits)
+    }
+
+
 class IBMProvider:
     """Wrapper para IBM Quantum"""
     
@@ -26,30 +170,72 @@ class IBMProvider:
         self.token = token
         self.instance = instance
         self.service = None
+        # Caché por instancia (backend_name -> (timestamp_monotonic, valor))
+        self._ttl_seconds = 120
+        self._backend_cache: Dict[str, Tuple[float, Any]] = {}
+        self._props_cache: Dict[str, Tuple[float, Any]] = {}
+        self._config_cache: Dict[str, Tuple[float, Any]] = {}
+        # PassManagers por (backend_name, optimization_level) -> (last_update_date, PassManager)
+        self._pm_cache: Dict[Tuple[str, int], Tuple[Any, Any]] = {}
+        # Samplers en Job Mode por backend_name -> (handle del backend, Sampler)
+        self._sampler_cache: Dict[str, Tuple[Any, Any]] = {}
+        # Se determina una sola vez en _initialize_service (Open Plan no soporta Session)
+        self._supports_session = True
+        # Clases del SDK, resueltas en _initialize_service
+        self._sampler_cls = None
+        self._session_cls = None
         self._initialize_service()
     
     def _initialize_service(self):
         """Inicializa el servicio de IBM Quantum"""
         try:
-            from qiskit_ibm_runtime import QiskitRuntimeService
-            
+            from qiskit_ibm_runtime import QiskitRuntimeService, Sampler, Session
+        except ImportError:
+            raise ImportError("qiskit-ibm-runtime no está instalado. Instala con: pip install qiskit-ibm-runtime")
+        self._sampler_cls = Sampler
+        self._session_cls = Session
+        
+        try:
             if self.token:
                 self.service = QiskitRuntimeService(token=self.token, instance=self.instance)
             else:
                 # Intentar usar token de variable de entorno o archivo de configuración
                 self.service = QiskitRuntimeService(instance=self.instance)
             print("✓ IBM Quantum Service inicializado")
-        except ImportError:
-            raise ImportError("qiskit-ibm-runtime no está instalado. Instala con: pip install qiskit-ibm-runtime")
         except Exception as e:
             raise Exception(f"Error al inicializar IBM Quantum Service: {e}")
+        
+        self._supports_session = self._detect_session_support()
+        if not self._supports_session:
+            print("  ⚠ Plan sin soporte de Session detectado. Se usará Job Mode directo")
     
-    def get_backend(self, backend_name: str = "ibmq_qasm_simulator"):
+    def _detect_session_support(self) -> bool:
+        """
+        Detecta si el plan de la cuenta permite abrir Sessions
+        El Open Plan no las soporta (p.ej. instancia 'ibm-q/open/main')
+        
+        Returns:
+            True si se asume soporte de Session
+        """
+        active_account = getattr(self.service, 'active_account', None)
+        if active_account is None:
+            return True
+        try:
+            account = active_account() or {}
+        except Exception:
+            return True
+        
+        plan = str(account.get('plan') or '').lower()
+        instance = str(account.get('instance') or self.instance or '').lower()
+        return 'open' not in plan and '/open/' not in f"/{instance}/"
+    
+    def get_backend(self, backend_name: str = "ibmq_qasm_simulator", bypass_cache: bool = False):
         """
         Obtiene un backend de IBM Quantum
         
         Args:
             backend_name: Nombre del backend (p.ej., 'ibmq_qasm_simulator', 'ibm_brisbane')
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             Backend de Qiskit
@@ -57,56 +243,100 @@ class IBMProvider:
         if not self.service:
             raise Exception("Service no inicializado")
         
-        try:
-            backend = self.service.backend(backend_name)
-            print(f"✓ Backend obtenido: {backend_name}")
-            return backend
-        except Exception as e:
-            raise Exception(f"Error al obtener backend {backend_name}: {e}")
+        def fetch():
+            try:
+                backend = self.service.backend(backend_name)
+                print(f"✓ Backend obtenido: {backend_name}")
+                return backend
+            except Exception as e:
+                raise Exception(f"Error al obtener backend {backend_name}: {e}")
+        
+        return _ttl_cached(self._backend_cache, backend_name, self._ttl_seconds, fetch, bypass_cache)
+    
+    def _get_properties(self, backend_name: str, bypass_cache: bool = False):
+        """Obtiene (con caché) las propiedades del backend; None si no están disponibles"""
+        # El handle del backend lo refresca el llamador si usa bypass_cache
+        backend = self.get_backend(backend_name)
+        
+        def fetch():
+            # Puede fallar para simuladores
+            try:
+                return backend.properties()
+            except Exception:
+                return None
+        
+        return _ttl_cached(self._props_cache, backend_name, self._ttl_seconds, fetch, bypass_cache)
+    
+    def _get_config(self, backend_name: str, bypass_cache: bool = False):
+        """Obtiene (con caché) la configuración del backend; None si no está disponible"""
+        backend = self.get_backend(backend_name)
+        
+        def fetch():
+            try:
+                return backend.configuration()
+            except Exception:
+                return None
+        
+        return _ttl_cached(self._config_cache, backend_name, self._ttl_seconds, fetch, bypass_cache)
     
-    def get_device_metadata(self, backend_name: str) -> Dict[str, Any]:
+    def _get_properties_and_config(self, backend_name: str, bypass_cache: bool = False) -> Tuple[Any, Any]:
+        """
+        Obtiene properties() y configuration() del backend
+        Solo se paraleliza (son dos llamadas REST independientes) cuando ambas faltan en caché
+        
+        Args:
+            backend_name: Nombre del backend
+            bypass_cache: Forzar una nueva consulta ignorando el caché
+        
+        Returns:
+            Tupla (properties, config); cualquiera puede ser None
+        """
+        self.get_backend(backend_name, bypass_cache)
+        ttl = self._ttl_seconds
+        if not bypass_cache and (_ttl_fresh(self._props_cache, backend_name, ttl)
+                                 or _ttl_fresh(self._config_cache, backend_name, ttl)):
+            # Al menos una ya está en caché: queda como mucho una llamada, sin hilos
+            return self._get_properties(backend_name), self._get_config(backend_name)
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            f_props = executor.submit(self._get_properties, backend_name, bypass_cache)
+            f_config = executor.submit(self._get_config, backend_name, bypass_cache)
+            return f_props.result(), f_config.result()
+    
+    def get_device_metadata(self, backend_name: str, bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Obtiene metadatos del dispositivo desde IBM Quantum
         
         Args:
             backend_name: Nombre del backend
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             DeviceMetadata como diccionario
         """
-        from model.qc_metadata_model import DeviceMetadata
-        
-        backend = self.get_backend(backend_name)
+        now = datetime.datetime.now(datetime.timezone.utc)
         
         # Obtener propiedades del backend (puede fallar para simuladores)
-        try:
-            properties = backend.properties()
-        except Exception:
-            properties = None
-        
-        try:
-            config = backend.configuration()
-        except Exception:
-            config = None
+        properties, config = self._get_properties_and_config(backend_name, bypass_cache)
+        backend = self.get_backend(backend_name)
         
         # Determinar tecnología
-        if "simulator" in backend_name.lower():
-            technology = "simulator"
-        elif "qasm" in backend_name.lower():
-            technology = "simulator"
-        else:
-            technology = "superconducting"  # IBM usa principalmente superconductores
+        technology = _classify_technology(backend_name, "IBM")
         
         # Obtener número de qubits
-        num_qubits = config.n_qubits if config and hasattr(config, 'n_qubits') else 32
+        num_qubits = getattr(config, 'n_qubits', 32) if config else 32
         
         # Obtener conectividad
-        connectivity = {}
-        if config and hasattr(config, 'coupling_map') and config.coupling_map:
+        # Materializar las aristas una sola vez como tupla inmutable (CouplingMap o lista)
+        cmap = getattr(config, 'coupling_map', None) if config else None
+        if hasattr(cmap, 'get_edges'):
+            cmap = cmap.get_edges()
+        edges = tuple(tuple(edge) for edge in cmap) if cmap else ()
+        if edges:
             connectivity = {
                 "topology_type": "coupling_map",
-                "coupling_map": config.coupling_map,
-                "num_edges": len(config.coupling_map)
+                "coupling_map": edges,
+                "num_edges": len(edges)
             }
         else:
             connectivity = {"topology_type": "all_to_all"}
@@ -114,49 +344,34 @@ class IBMProvider:
         # Obtener características de ruido
         noise_characteristics = {}
         if properties and config:
-            try:
-                t1_values = []
-                t2_values = []
-                for qubit in range(num_qubits):
-                    try:
-                        t1 = properties.t1(qubit)
-                        if t1 is not None:
-                            t1_values.append(t1)
-                    except Exception:
-                        pass
-                    try:
-                        t2 = properties.t2(qubit)
-                        if t2 is not None:
-                            t2_values.append(t2)
-                    except Exception:
-                        pass
-                
-                if t1_values:
-                    noise_characteristics["avg_t1_us"] = sum(t1_values) / len(t1_values) * 1e6  # Convertir a microsegundos
-                if t2_values:
-                    noise_characteristics["avg_t2_us"] = sum(t2_values) / len(t2_values) * 1e6
-            except Exception:
-                pass
+            props_by_qubit = _qubit_properties_by_index(properties)
+            t1_values = [p['T1'] for p in props_by_qubit.values() if p.get('T1') is not None]
+            t2_values = [p['T2'] for p in props_by_qubit.values() if p.get('T2') is not None]
+            
+            # Convertir a microsegundos y agregar en NumPy
+            for key, values in (("t1", t1_values), ("t2", t2_values)):
+                if values:
+                    arr = np.fromiter(values, dtype=np.float64, count=len(values)) * 1e6
+                    noise_characteristics[f"avg_{key}_us"] = float(arr.mean())
+                    noise_characteristics[f"std_{key}_us"] = float(arr.std())
+                    noise_characteristics[f"min_{key}_us"] = float(arr.min())
+                    noise_characteristics[f"max_{key}_us"] = float(arr.max())
         
         # Obtener parámetros operacionales
         operational_parameters = {}
         if config:
-            if hasattr(config, 'basis_gates'):
-                operational_parameters["basis_gates"] = config.basis_gates
-            if hasattr(config, 'max_shots'):
-                operational_parameters["max_shots"] = config.max_shots
-            if hasattr(config, 'backend_version'):
-                operational_parameters["backend_version"] = config.backend_version
-        
-        if hasattr(backend, 'is_local'):
-            operational_parameters["local"] = backend.is_local()
-        if hasattr(backend, 'is_simulator'):
-            operational_parameters["simulator"] = backend.is_simulator()
+            for attr in ('basis_gates', 'max_shots', 'backend_version'):
+                value = getattr(config, attr, _MISSING)
+                if value is not _MISSING:
+                    operational_parameters[attr] = value
+        
+        for key, attr in (("local", 'is_local'), ("simulator", 'is_simulator')):
+            probe = getattr(backend, attr, None)
+            if probe is not None:
+                operational_parameters[key] = probe()
         
         # Obtener versión del backend
-        backend_version = "1.0"
-        if config and hasattr(config, 'backend_version'):
-            backend_version = config.backend_version
+        backend_version = getattr(config, 'backend_version', "1.0") if config else "1.0"
         
         device_metadata = DeviceMetadata(
             device_id=backend_name,
@@ -165,7 +380,7 @@ class IBMProvider:
             backend_name=backend_name,
             num_qubits=num_qubits,
             version=backend_version,
-            timestamp_metadata=datetime.datetime.utcnow().isoformat() + "Z",
+            timestamp_metadata=format_utc_iso(now),
             connectivity=connectivity,
             noise_characteristics=noise_characteristics,
             operational_parameters=operational_parameters
@@ -173,40 +388,60 @@ class IBMProvider:
         
         return device_metadata
     
-    def get_calibration_data(self, backend_name: str) -> Any:
+    async def get_device_metadata_async(self, backend_name: str, bypass_cache: bool = False) -> Any:
+        """
+        Versión asíncrona de get_device_metadata (se ejecuta en un hilo)
+        
+        Args:
+            backend_name: Nombre del backend
+            bypass_cache: Forzar una nueva consulta ignorando el caché
+        
+        Returns:
+            DeviceMetadata
+        """
+        return await asyncio.to_thread(self.get_device_metadata, backend_name, bypass_cache)
+    
+    async def get_devices_metadata_async(self, backend_names: List[str], bypass_cache: bool = False) -> List[Any]:
+        """
+        Obtiene los metadatos de varios backends concurrentemente
+        
+        Args:
+            backend_names: Lista de nombres de backends
+            bypass_cache: Forzar una nueva consulta ignorando el caché
+        
+        Returns:
+            Lista de DeviceMetadata (mismo orden que backend_names)
+        """
+        return list(await asyncio.gather(
+            *(self.get_device_metadata_async(name, bypass_cache) for name in backend_names)
+        ))
+    
+    def get_calibration_data(self, backend_name: str, bypass_cache: bool = False) -> Any:
         """
         Obtiene datos de calibración desde IBM Quantum
         
         Args:
             backend_name: Nombre del backend
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             CalibrationData
         """
-        from model.qc_metadata_model import CalibrationData
-        
-        backend = self.get_backend(backend_name)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        iso_now = format_utc_iso(now)
+        suffix = _id_suffix()
         
         # Intentar obtener propiedades del backend
-        try:
-            properties = backend.properties()
-        except Exception:
-            properties = None
-        
-        try:
-            config = backend.configuration()
-            num_qubits = config.n_qubits if hasattr(config, 'n_qubits') else 32
-        except Exception:
-            config = None
-            num_qubits = 32
+        properties, config = self._get_properties_and_config(backend_name, bypass_cache)
+        num_qubits = getattr(config, 'n_qubits', 32) if config else 32
         
         if not properties:
             # Para simuladores, crear calibración dummy
             return CalibrationData(
-                calibration_id=f"cal_{backend_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                calibration_id=f"cal_{backend_name}_{suffix}",
                 device_id=backend_name,
-                timestamp_captured=datetime.datetime.utcnow().isoformat() + "Z",
-                valid_until=(datetime.datetime.utcnow() + datetime.timedelta(hours=4)).isoformat() + "Z",
+                timestamp_captured=iso_now,
+                valid_until=format_utc_iso(now + datetime.timedelta(hours=4)),
                 calibration_method="simulator_default",
                 calibration_version="1.0",
                 qubit_properties={},
@@ -214,89 +449,163 @@ class IBMProvider:
                 crosstalk_matrix={}
             )
         
-        # Obtener propiedades de qubits
-        qubit_properties = {}
-        if config:
-            for qubit in range(num_qubits):
-                qubit_props = {}
-                try:
-                    t1 = properties.t1(qubit)
-                    if t1 is not None:
-                        qubit_props["t1_us"] = t1 * 1e6  # Convertir a microsegundos
-                except Exception:
-                    pass
-                try:
-                    t2 = properties.t2(qubit)
-                    if t2 is not None:
-                        qubit_props["t2_us"] = t2 * 1e6
-                except Exception:
-                    pass
-                try:
-                    readout_error = properties.readout_error(qubit)
-                    if readout_error is not None:
-                        qubit_props["readout_error"] = readout_error
-                except Exception:
-                    pass
-                if qubit_props:
-                    qubit_properties[qubit] = qubit_props
+        # Obtener propiedades de qubits (T1/T2 en µs; se omiten qubits sin datos)
+        props_map = {
+            qubit: {
+                key: props[name] * scale
+                for name, key, scale in _CALIBRATION_QUBIT_FIELDS
+                if props.get(name) is not None
+            }
+            for qubit, props in _qubit_properties_by_index(properties).items()
+        } if config else {}
+        qubit_properties = {qubit: props for qubit, props in props_map.items() if props}
         
         # Obtener fidelidades de puertas
         gate_fidelities = {"1q_gates": {}, "2q_gates": {}}
-        try:
-            if hasattr(properties, 'gates'):
-                for gate in properties.gates:
-                    gate_name = gate.gate
-                    qubits = gate.qubits
-                    if len(qubits) == 1:
-                        try:
-                            gate_error = properties.gate_error(gate_name, qubits[0])
-                            if gate_error is not None:
-                                gate_fidelities["1q_gates"][f"{gate_name}_{qubits[0]}"] = 1 - gate_error
-                        except Exception:
-                            pass
-                    elif len(qubits) == 2:
-                        try:
-                            gate_error = properties.gate_error(gate_name, qubits)
-                            if gate_error is not None:
-                                gate_fidelities["2q_gates"][f"{gate_name}_{qubits[0]}_{qubits[1]}"] = 1 - gate_error
-                        except Exception:
-                            pass
-        except Exception:
-            pass
+        for gate in getattr(properties, 'gates', None) or []:
+            qubits = gate.qubits
+            num_gate_qubits = len(qubits)
+            if num_gate_qubits not in (1, 2):
+                continue
+            # Cada Gate ya trae su gate_error como Nduv (evita re-escanear con gate_error())
+            gate_error = {p.name: p.value for p in gate.parameters}.get('gate_error')
+            if gate_error is None:
+                continue
+            group = "1q_gates" if num_gate_qubits == 1 else "2q_gates"
+            gate_fidelities[group][f"{gate.gate}_{'_'.join(map(str, qubits))}"] = 1 - gate_error
         
         # Obtener timestamp de calibración
-        try:
-            if hasattr(properties, 'last_update_date'):
-                last_update_date = properties.last_update_date
-            else:
-                last_update_date = datetime.datetime.utcnow()
-        except Exception:
-            last_update_date = datetime.datetime.utcnow()
+        last_update_date = getattr(properties, 'last_update_date', now)
         
         # Calcular validez (típicamente 24 horas para IBM)
         if isinstance(last_update_date, datetime.datetime):
             valid_until = last_update_date + datetime.timedelta(hours=24)
         else:
-            valid_until = datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+            valid_until = now + datetime.timedelta(hours=24)
         
         calibration = CalibrationData(
-            calibration_id=f"cal_{backend_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            calibration_id=f"cal_{backend_name}_{suffix}",
             device_id=backend_name,
-            timestamp_captured=last_update_date.isoformat() + "Z" if isinstance(last_update_date, datetime.datetime) else datetime.datetime.utcnow().isoformat() + "Z",
-            valid_until=valid_until.isoformat() + "Z",
+            timestamp_captured=format_utc_iso(last_update_date) if isinstance(last_update_date, datetime.datetime) else iso_now,
+            valid_until=format_utc_iso(valid_until),
             calibration_method="ibm_quantum_api",
             calibration_version="1.0",
             qubit_properties=qubit_properties,
             gate_fidelities=gate_fidelities,
             crosstalk_matrix={},
             additional_metrics={
-                "last_update_date": last_update_date.isoformat() + "Z" if isinstance(last_update_date, datetime.datetime) else None
+                "last_update_date": format_utc_iso(last_update_date) if isinstance(last_update_date, datetime.datetime) else None
             }
         )
         
         return calibration
     
-    def execute_circuit(self, circuit, backend_name: str, shots: int = 1024, **kwargs) -> Dict[str, Any]:
+    def _get_pass_manager(self, backend_name: str, backend, optimization_level: int = 1):
+        """
+        Obtiene (con caché) el PassManager preset para el backend
+        Se reconstruye si cambia la fecha de calibración del backend
+        
+        Args:
+            backend_name: Nombre del backend
+            backend: Backend de Qiskit
+            optimization_level: Nivel de optimización del transpilador
+        
+        Returns:
+            PassManager de Qiskit
+        """
+        properties = self._get_properties(backend_name)
+        calibration_stamp = getattr(properties, 'last_update_date', None)
+        key = (backend_name, optimization_level)
+        
+        cached = self._pm_cache.get(key)
+        if cached is not None and cached[0] == calibration_stamp:
+            return cached[1]
+        
+        pass_manager = generate_preset_pass_manager(optimization_level=optimization_level, backend=backend)
+        self._pm_cache[key] = (calibration_stamp, pass_manager)
+        return pass_manager
+    
+    @staticmethod
+    def _remove_idle_qubits(circuit):
+        """Elimina los qubits inactivos del circuito si la versión de Qiskit lo soporta"""
+        if hasattr(circuit, "remove_idle_qubits"):
+            try:
+                return circuit.remove_idle_qubits()
+            except Exception:
+                pass
+        return circuit
+    
+    def _job_mode_sampler(self, backend):
+        """Construye un Sampler en Job Mode (sin Session) compatible con varias versiones"""
+        Sampler = self._sampler_cls
+        try:
+            return Sampler(mode=backend)
+        except TypeError:
+            # Fallback for versions needing backend arg directly or service
+            try:
+                return Sampler(backend=backend)
+            except TypeError:
+                # Último intento: sin argumentos, asumiendo contexto global o default
+                return Sampler()
+    
+    def _get_job_mode_sampler(self, backend_name: str, backend):
+        """
+        Reutiliza el Sampler en Job Mode del backend entre llamadas
+        (SamplerV2 admite varios run(); solo se reconstruye si cambia el handle del backend)
+        """
+        cached = self._sampler_cache.get(backend_name)
+        if cached is not None and cached[0] is backend:
+            return cached[1]
+        
+        sampler = self._job_mode_sampler(backend)
+        self._sampler_cache[backend_name] = (backend, sampler)
+        return sampler
+    
+    @staticmethod
+    def _extract_counts(result, index: int, num_qubits: int, shots: int) -> Dict[str, int]:
+        """
+        Extrae los counts del pub `index` de un resultado de Sampler (V2 o V1)
+        
+        Args:
+            result: Resultado del Sampler (PrimitiveResult o SamplerResult)
+            index: Índice del circuito dentro del lote
+            num_qubits: Número de qubits del circuito (para formatear bitstrings)
+            shots: Número de shots
+        
+        Returns:
+            Diccionario de counts
+        """
+        counts = {}
+        # Manejo de resultados V2 (PrimitiveResult)
+        if hasattr(result, '__getitem__') and hasattr(result[index], 'data'):
+            # Con measure_all la info está en 'meas'; en general tomamos
+            # el primer registro de bits disponible
+            data = result[index].data
+            # DataBin (V2) es iterable sobre los nombres de sus registros de bits
+            reg_names = list(data) if hasattr(data, '__iter__') else ['meas', 'c']
+            for name in reg_names:
+                val = getattr(data, name, None)
+                if hasattr(val, 'get_counts'):
+                    counts = val.get_counts()
+                    break
+        
+        # Manejo de resultados V1 (quasi_dists)
+        elif hasattr(result, "quasi_dists"):
+            quasi_dist = result.quasi_dists[index]
+            for bitstr, prob in quasi_dist.items():
+                if isinstance(bitstr, int):
+                    key = format(bitstr, f"0{num_qubits}b")
+                else:
+                    key = bitstr
+                counts[key] = int(prob * shots)
+        else:
+            # Fallback si no se encuentra estructura conocida
+            counts = {"0" * num_qubits: shots}
+        
+        return counts
+    
+    def execute_circuit(self, circuit, backend_name: str, shots: int = 1024,
+                        simplify: bool = False, **kwargs) -> Dict[str, Any]:
         """
         Ejecuta un circuito en un backend de IBM Quantum
         
@@ -304,119 +613,124 @@ class IBMProvider:
             circuit: Circuito cuántico de Qiskit
             backend_name: Nombre del backend
             shots: Número de shots
+            simplify: Eliminar qubits inactivos antes de transpilar
             **kwargs: Argumentos adicionales para la ejecución
         
         Returns:
             Diccionario con resultados
         """
-        backend = self.service.backend(backend_name)
+        return self.execute_circuits([circuit], backend_name, shots=shots, simplify=simplify, **kwargs)[0]
+    
+    def execute_circuits(self, circuits: List, backend_name: str, shots: int = 1024,
+                         simplify: bool = False, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Ejecuta un lote de circuitos en un backend de IBM Quantum
+        Transpila todos los circuitos juntos y los envía en un único sampler.run()
+        (una sola Session/job para todo el lote)
+        
+        Args:
+            circuits: Lista de circuitos cuánticos de Qiskit
+            backend_name: Nombre del backend
+            shots: Número de shots (por circuito)
+            simplify: Eliminar qubits inactivos antes de transpilar
+            **kwargs: Argumentos adicionales para la ejecución
+        
+        Returns:
+            Lista de diccionarios con resultados (uno por circuito, en el mismo orden)
+        """
+        backend = self.get_backend(backend_name)
 
-        circuit_to_run = circuit.copy()
-        # Asegurar que haya mediciones
-        if circuit_to_run.num_clbits == 0:
-            circuit_to_run.measure_all()
+        circuits_to_run = []
+        for circuit in circuits:
+            # Asegurar que haya mediciones (solo se copia si hay que modificar el circuito)
+            if circuit.num_clbits == 0:
+                circuit_to_run = circuit.copy()
+                circuit_to_run.measure_all()
+            else:
+                circuit_to_run = circuit
 
-        if hasattr(circuit_to_run, "remove_idle_qubits"):
-            try:
-                circuit_to_run = circuit_to_run.remove_idle_qubits()
-            except Exception:
-                pass
+            if simplify:
+                circuit_to_run = self._remove_idle_qubits(circuit_to_run)
+            circuits_to_run.append(circuit_to_run)
 
         # Ejecutar utilizando Sampler (interfaz actual recomendada)
         try:
-            from qiskit import transpile
             # V2 primitives require circuits to be transpiled to Instruction Set Architecture (ISA)
             # before execution.
-            isa_circuit = transpile(circuit_to_run, backend=backend, optimization_level=1)
-            
-            from qiskit_ibm_runtime import Sampler, Session
+            pass_manager = self._get_pass_manager(backend_name, backend, optimization_level=1)
+            isa_circuits = pass_manager.run(circuits_to_run)
 
-            # Intentar usar Session primero (mejor rendimiento si está disponible)
-            try:
-                # Session signature varies by version; safer to pass backend keyword
-                with Session(backend=backend) as session:
-                    # Sampler V2 uses 'mode' instead of 'session' in some versions, or 'session' in others.
-                    try:
-                        sampler = Sampler(mode=session)
-                    except TypeError:
-                        # Fallback for versions where arg is named 'session'
-                        sampler = Sampler(session=session)
-
-                    # Sampler V2 run() expects a list of pubs (circuits)
-                    job = sampler.run([isa_circuit], shots=shots)
-                    result = job.result()
+            result = None
+            # Usar Session si el plan lo permite (mejor rendimiento si está disponible)
+            if self._supports_session:
+                try:
+                    # Session signature varies by version; safer to pass backend keyword
+                    Sampler = self._sampler_cls
+                    with self._session_cls(backend=backend) as session:
+                        # Sampler V2 uses 'mode' instead of 'session' in some versions, or 'session' in others.
+                        try:
+                            sampler = Sampler(mode=session)
+                        except TypeError:
+                            # Fallback for versions where arg is named 'session'
+                            sampler = Sampler(session=session)
 
-            except Exception as e:
-                # Si falla Session (ej. Open Plan no lo soporta), intentar Job Mode
-                if "open plan" in str(e).lower() or "not authorized" in str(e).lower():
-                    print(f"  ⚠ Session no soportada en este plan. Intentando Job Mode directo...")
-                    try:
-                        sampler = Sampler(mode=backend)
-                    except TypeError:
-                         # Fallback for versions needing backend arg directly or service
-                         try:
-                             sampler = Sampler(backend=backend)
-                         except TypeError:
-                             # Último intento: sin argumentos, asumiendo contexto global o default
-                             sampler = Sampler()
-                    
-                    job = sampler.run([isa_circuit], shots=shots)
-                    result = job.result()
-                else:
-                    raise e
+                        # Sampler V2 run() expects a list of pubs (circuits)
+                        job = sampler.run(isa_circuits, shots=shots)
+                        result = job.result()
 
-            counts = {}
-            # Manejo de resultados V2 (PrimitiveResult)
-            if hasattr(result, '__getitem__') and hasattr(result[0], 'data'):
-                # Asumimos que si usamos measure_all la info está en 'meas'
-                # O buscamos el primer registro de bits disponible
-                pub_result = result[0]
-                if hasattr(pub_result.data, 'meas'):
-                    counts = pub_result.data.meas.get_counts()
-                elif hasattr(pub_result.data, 'c'):
-                    counts = pub_result.data.c.get_counts()
-                else:
-                    # Intentar encontrar cualquier atributo que parezca un registro de bits
-                    for attr in dir(pub_result.data):
-                        val = getattr(pub_result.data, attr)
-                        if hasattr(val, 'get_counts'):
-                            counts = val.get_counts()
-                            break
-            
-            # Manejo de resultados V1 (quasi_dists)
-            elif hasattr(result, "quasi_dists"):
-                quasi_dist = result.quasi_dists[0]
-                for bitstr, prob in quasi_dist.items():
-                    if isinstance(bitstr, int):
-                        key = format(bitstr, f"0{circuit_to_run.num_qubits}b")
+                except Exception as e:
+                    # La detección inicial no fue concluyente: recordar que el plan
+                    # no soporta Session para no repetir el intento en cada llamada
+                    if "open plan" in str(e).lower() or "not authorized" in str(e).lower():
+                        print(f"  ⚠ Session no soportada en este plan. Usando Job Mode directo...")
+                        self._supports_session = False
                     else:
-                        key = bitstr
-                    counts[key] = int(prob * shots)
-            else:
-                # Fallback si no se encuentra estructura conocida
-                counts = {"0" * circuit_to_run.num_qubits: shots}
+                        raise e
+
+            if result is None:
+                # Job Mode (ej. Open Plan no soporta Session)
+                sampler = self._get_job_mode_sampler(backend_name, backend)
+                job = sampler.run(isa_circuits, shots=shots)
+                result = job.result()
+
+            counts_list = [
+                self._extract_counts(result, i, circuit_to_run.num_qubits, shots)
+                for i, circuit_to_run in enumerate(circuits_to_run)
+            ]
 
         except Exception as e:
             print(f"  ⚠ Error en Sampler Runtime: {e}. Usando fallback Aer.")
-            from qiskit import transpile
             # Fallback utilizando AerSimulator para entornos locales
-            from qiskit_aer import AerSimulator
+            if not HAS_AER:
+                raise ImportError("qiskit-aer no está instalado. Instala con: pip install qiskit-aer")
 
-            simulator = AerSimulator()
-            # Usamos circuit_to_run que ya tiene mediciones
-            compiled_local = transpile(circuit_to_run, simulator)
+            # 0 = usar todos los núcleos; Aer reparte hilos entre experimentos y shots
+            simulator = AerSimulator(
+                method='automatic',
+                max_parallel_threads=0,
+                max_parallel_experiments=0,
+                statevector_parallel_threshold=14,
+            )
+            # Usamos circuits_to_run que ya tienen mediciones
+            compiled_local = transpile(circuits_to_run, simulator)
             job = simulator.run(compiled_local, shots=shots)
             result = job.result()
-            counts = result.get_counts()
+            counts_list = [result.get_counts(i) for i in range(len(circuits_to_run))]
 
-        return {
-            "counts": counts,
-            "shots": shots,
-            "success": True,
-            "job_id": job.job_id() if hasattr(job, 'job_id') else f"job_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "backend_name": backend_name,
-            "execution_time": getattr(result, 'execution_time', None)
-        }
+        job_id = job.job_id() if hasattr(job, 'job_id') else f"job_{_id_suffix()}"
+        execution_time = getattr(result, 'execution_time', None)
+
+        return [
+            {
+                "counts": counts,
+                "shots": shots,
+                "success": True,
+                "job_id": job_id,
+                "backend_name": backend_name,
+                "execution_time": execution_time
+            }
+            for counts in counts_list
+        ]
 
 
 # ============================================================
@@ -436,6 +750,12 @@ class AWSBraketProvider:
         """
         self.aws_profile = aws_profile
         self.region = region
+        # Caché por instancia (device_arn -> (timestamp_monotonic, valor))
+        self._ttl_seconds = 120
+        self._device_cache: Dict[str, Tuple[float, Any]] = {}
+        self._device_props_cache: Dict[str, Tuple[float, Any]] = {}
+        # Clase del SDK, resuelta en _initialize_service
+        self._aws_device_cls = None
         self._initialize_service()
     
     def _initialize_service(self):
@@ -443,63 +763,64 @@ class AWSBraketProvider:
         try:
             import boto3
             from braket.aws import AwsDevice
-            
+        except ImportError:
+            raise ImportError("aws-braket-sdk no está instalado. Instala con: pip install amazon-braket-sdk")
+        self._aws_device_cls = AwsDevice
+        
+        try:
             if self.aws_profile:
                 self.session = boto3.Session(profile_name=self.aws_profile, region_name=self.region)
             else:
                 self.session = boto3.Session(region_name=self.region)
             
             print("✓ AWS Braket Service inicializado")
-        except ImportError:
-            raise ImportError("aws-braket-sdk no está instalado. Instala con: pip install amazon-braket-sdk")
         except Exception as e:
             raise Exception(f"Error al inicializar AWS Braket Service: {e}")
     
-    def get_device(self, device_arn: str):
+    def get_device(self, device_arn: str, bypass_cache: bool = False):
         """
         Obtiene un dispositivo de AWS Braket
         
         Args:
             device_arn: ARN del dispositivo (p.ej., 'arn:aws:braket:::device/quantum-simulator/amazon/sv1')
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             Dispositivo de Braket
         """
-        try:
-            from braket.aws import AwsDevice
-            
-            device = AwsDevice(device_arn, aws_session=self.session)
-            print(f"✓ Dispositivo obtenido: {device_arn}")
-            return device
-        except Exception as e:
-            raise Exception(f"Error al obtener dispositivo {device_arn}: {e}")
+        def fetch():
+            try:
+                device = self._aws_device_cls(device_arn, aws_session=self.session)
+                print(f"✓ Dispositivo obtenido: {device_arn}")
+                return device
+            except Exception as e:
+                raise Exception(f"Error al obtener dispositivo {device_arn}: {e}")
+        
+        return _ttl_cached(self._device_cache, device_arn, self._ttl_seconds, fetch, bypass_cache)
+    
+    def _get_device_properties(self, device_arn: str, bypass_cache: bool = False):
+        """Obtiene (con caché) device.properties; algunas versiones del SDK lo refrescan en cada acceso"""
+        device = self.get_device(device_arn, bypass_cache)
+        return _ttl_cached(self._device_props_cache, device_arn, self._ttl_seconds,
+                           lambda: device.properties, bypass_cache)
     
-    def get_device_metadata(self, device_arn: str) -> Dict[str, Any]:
+    def get_device_metadata(self, device_arn: str, bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Obtiene metadatos del dispositivo desde AWS Braket
         
         Args:
             device_arn: ARN del dispositivo
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             DeviceMetadata como diccionario
         """
-        from model.qc_metadata_model import DeviceMetadata
-        
+        now = datetime.datetime.now(datetime.timezone.utc)
+        properties = self._get_device_properties(device_arn, bypass_cache)
         device = self.get_device(device_arn)
-        properties = device.properties
         
         # Determinar tecnología
-        if "simulator" in device_arn.lower():
-            technology = "simulator"
-        elif "rigetti" in device_arn.lower():
-            technology = "superconducting"
-        elif "ionq" in device_arn.lower():
-            technology = "ion_trap"
-        elif "oqc" in device_arn.lower():
-            technology = "superconducting"
-        else:
-            technology = "unknown"
+        technology = _classify_technology(device_arn, "AWS")
         
         # Obtener conectividad
         connectivity = {}
@@ -525,7 +846,7 @@ class AWSBraketProvider:
             backend_name=device.name,
             num_qubits=num_qubits,
             version=getattr(properties, 'deviceDocumentation', {}).get('version', '1.0') if hasattr(properties, 'deviceDocumentation') else '1.0',
-            timestamp_metadata=datetime.datetime.utcnow().isoformat() + "Z",
+            timestamp_metadata=format_utc_iso(now),
             connectivity=connectivity,
             noise_characteristics={},
             operational_parameters={
@@ -537,30 +858,30 @@ class AWSBraketProvider:
         
         return device_metadata
     
-    def get_calibration_data(self, device_arn: str) -> Any:
+    def get_calibration_data(self, device_arn: str, bypass_cache: bool = False) -> Any:
         """
         Obtiene datos de calibración desde AWS Braket
         
         Args:
             device_arn: ARN del dispositivo
+            bypass_cache: Forzar una nueva consulta ignorando el caché
         
         Returns:
             CalibrationData
         """
-        from model.qc_metadata_model import CalibrationData
-        
+        now = datetime.datetime.now(datetime.timezone.utc)
+        properties = self._get_device_properties(device_arn, bypass_cache)
         device = self.get_device(device_arn)
-        properties = device.properties
         
         # Para simuladores, crear calibración dummy
         # Para QPUs reales, AWS Braket no expone calibración directamente
         # pero podemos usar las propiedades del dispositivo
         
         calibration = CalibrationData(
-            calibration_id=f"cal_{device_arn.replace('/', '_')}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            calibration_id=f"cal_{device_arn.replace('/', '_')}_{_id_suffix()}",
             device_id=device_arn,
-            timestamp_captured=datetime.datetime.utcnow().isoformat() + "Z",
-            valid_until=(datetime.datetime.utcnow() + datetime.timedelta(hours=24)).isoformat() + "Z",
+            timestamp_captured=format_utc_iso(now),
+            valid_until=format_utc_iso(now + datetime.timedelta(hours=24)),
             calibration_method="aws_braket_api",
             calibration_version="1.0",
             qubit_properties={},
@@ -568,7 +889,7 @@ class AWSBraketProvider:
             crosstalk_matrix={},
             additional_metrics={
                 "device_status": device.status,
-                "device_type": "simulator" if "simulator" in device_arn.lower() else "qpu"
+                "device_type": "simulator" if _classify_technology(device_arn, "AWS") == "simulator" else "qpu"
             }
         )
         
@@ -635,18 +956,25 @@ class SpinQProvider:
         self.password = password
         self.engine = None
         self.compiler = None
+        # Ejecutables compilados por estructura de circuito (LRU acotado)
+        self._exe_cache: "collections.OrderedDict[Tuple, Any]" = collections.OrderedDict()
+        self._exe_cache_size = 64
+        # Clase del SDK, resuelta en _initialize_service
+        self._nmr_config_cls = None
         self._initialize_service()
     
     def _initialize_service(self):
         """Inicializa el servicio de SpinQ"""
         try:
-            from spinqit import get_nmr, get_compiler
-            
+            from spinqit import get_nmr, get_compiler, NMRConfig
+        except ImportError:
+            raise ImportError("spinqit no está instalado. Instala con: pip install spinqit")
+        self._nmr_config_cls = NMRConfig
+        
+        try:
             self.engine = get_nmr()
             self.compiler = get_compiler("native")
             print("✓ SpinQ NMR Service inicializado")
-        except ImportError:
-            raise ImportError("spinqit no está instalado. Instala con: pip install spinqit")
         except Exception as e:
             raise Exception(f"Error al inicializar SpinQ Service: {e}")
     
@@ -660,7 +988,7 @@ class SpinQProvider:
         Returns:
             DeviceMetadata como diccionario
         """
-        from model.qc_metadata_model import DeviceMetadata
+        now = datetime.datetime.now(datetime.timezone.utc)
         
         # SpinQ NMR típicamente tiene 2 qubits (según la documentación)
         device_metadata = DeviceMetadata(
@@ -670,7 +998,7 @@ class SpinQProvider:
             backend_name=device_name,
             num_qubits=2,  # Límite físico según documentación
             version="1.0",
-            timestamp_metadata=datetime.datetime.utcnow().isoformat() + "Z",
+            timestamp_metadata=format_utc_iso(now),
             connectivity={"topology_type": "all_to_all"},  # NMR típicamente permite todas las conexiones
             noise_characteristics={},  # NMR no expone estas métricas fácilmente
             operational_parameters={
@@ -693,14 +1021,14 @@ class SpinQProvider:
         Returns:
             CalibrationData
         """
-        from model.qc_metadata_model import CalibrationData
+        now = datetime.datetime.now(datetime.timezone.utc)
         
         # NMR no tiene calibración expuesta, creamos datos dummy
         calibration = CalibrationData(
-            calibration_id=f"cal_{device_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            calibration_id=f"cal_{device_name}_{_id_suffix()}",
             device_id=device_name,
-            timestamp_captured=datetime.datetime.utcnow().isoformat() + "Z",
-            valid_until=(datetime.datetime.utcnow() + datetime.timedelta(hours=24)).isoformat() + "Z",
+            timestamp_captured=format_utc_iso(now),
+            valid_until=format_utc_iso(now + datetime.timedelta(hours=24)),
             calibration_method="nmr_default",
             calibration_version="1.0",
             qubit_properties={
@@ -720,6 +1048,47 @@ class SpinQProvider:
         
         return calibration
     
+    @staticmethod
+    def _circuit_key(circuit_spinq) -> Optional[Tuple]:
+        """
+        Clave estructural del circuito: (puerta, qubits, parámetros) por instrucción
+        
+        Returns:
+            Tupla hashable, o None si el circuito no se puede identificar
+        """
+        instructions = getattr(circuit_spinq, 'instructions', None)
+        if instructions is None:
+            return None
+        try:
+            key = (getattr(circuit_spinq, 'qubits_num', None),) + tuple(
+                (
+                    getattr(inst.gate, 'label', str(inst.gate)),
+                    tuple(inst.qubits),
+                    tuple(getattr(inst, 'params', None) or ()),
+                )
+                for inst in instructions
+            )
+            hash(key)
+        except (AttributeError, TypeError):
+            return None
+        return key
+    
+    def _compile(self, circuit_spinq):
+        """Compila el circuito con caché LRU por clave estructural"""
+        key = self._circuit_key(circuit_spinq)
+        if key is None:
+            return self.compiler.compile(circuit_spinq, 0)
+        
+        if key in self._exe_cache:
+            self._exe_cache.move_to_end(key)
+            return self._exe_cache[key]
+        
+        exe = self.compiler.compile(circuit_spinq, 0)
+        self._exe_cache[key] = exe
+        if len(self._exe_cache) > self._exe_cache_size:
+            self._exe_cache.popitem(last=False)
+        return exe
+    
     def execute_circuit(self, circuit_spinq, shots: int = 1024, task_name: str = None, **kwargs) -> Dict[str, Any]:
         """
         Ejecuta un circuito en SpinQ NMR
@@ -734,13 +1103,11 @@ class SpinQProvider:
             Diccionario con resultados
         """
         try:
-            from spinqit import NMRConfig
-            
-            # Compilar el circuito
-            exe = self.compiler.compile(circuit_spinq, 0)
+            # Compilar el circuito (reutiliza el ejecutable si la estructura no cambió)
+            exe = self._compile(circuit_spinq)
             
             # Configurar conexión
-            config = NMRConfig()
+            config = self._nmr_config_cls()
             config.configure_shots(shots)
             config.configure_ip(self.ip)
             config.configure_port(self.port)
@@ -751,7 +1118,7 @@ class SpinQProvider:
             if task_name:
                 config.configure_task(task_name, task_name)
             else:
-                task_name = f"task_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                task_name = f"task_{_id_suffix()}"
                 config.configure_task(task_name, task_name)
             
             # Ejecutar
@@ -763,14 +1130,20 @@ class SpinQProvider:
                 probs = result.probabilities
                 # probs es un diccionario o array, convertir a counts
                 if isinstance(probs, dict):
-                    for state, prob in probs.items():
-                        counts[str(state)] = int(prob * shots)
-                elif isinstance(probs, (list, tuple)):
+                    # Mismo redondeo que la rama de arrays; se omiten estados sin cuentas
+                    counts = {
+                        str(state): count
+                        for state, prob in probs.items()
+                        if (count := round(prob * shots))
+                    }
+                elif isinstance(probs, (list, tuple, np.ndarray)):
                     # Si es array, asumir orden binario (00, 01, 10, 11)
-                    num_qubits = circuit_spinq.num_qubits if hasattr(circuit_spinq, 'num_qubits') else 2
-                    for i, prob in enumerate(probs):
-                        state_str = format(i, f'0{num_qubits}b')
-                        counts[state_str] = int(prob * shots)
+                    num_qubits = getattr(circuit_spinq, 'num_qubits', 2)
+                    counts_arr = np.rint(np.asarray(probs, dtype=np.float64) * shots).astype(np.int64)
+                    # Solo se formatean los estados con cuentas no nulas
+                    nonzero = np.flatnonzero(counts_arr)
+                    states = bitstrings(nonzero.tolist(), num_qubits)
+                    counts = dict(zip(states, counts_arr[nonzero].tolist()))
             
             return {
                 "counts": counts,
@@ -801,10 +1174,13 @@ def convert_qiskit_to_braket(qiskit_circuit):
         Circuito de Braket
     """
     try:
-        from braket.circuits import Circuit
+        from braket.circuits import Circuit as BraketCircuit
         from braket.circuits import gates as braket_gates
-        
-        braket_circuit = Circuit()
+    except ImportError:
+        raise ImportError("amazon-braket-sdk no está instalado")
+    
+    try:
+        braket_circuit = BraketCircuit()
         
         # Mapeo de puertas básicas
         gate_map = {
@@ -819,32 +1195,26 @@ def convert_qiskit_to_braket(qiskit_circuit):
             'rx': braket_gates.Rx,
         }
         
-        for instruction in qiskit_circuit.data:
-            gate_name = instruction.operation.name
-            qubits = [q.index for q in instruction.qubits]
-            
-            if gate_name in gate_map:
-                gate_class = gate_map[gate_name]
-                params = instruction.operation.params
-                
-                if params:
-                    braket_circuit += gate_class(qubits[0], *[float(p) for p in params])
-                else:
-                    if len(qubits) == 1:
-                        braket_circuit += gate_class(qubits[0])
-                    elif len(qubits) == 2:
-                        braket_circuit += gate_class(qubits[0], qubits[1])
+        # Índices de qubits resueltos una sola vez (Qubit.index ya no existe en Qiskit 1.0)
+        bit_index = {bit: i for i, bit in enumerate(qiskit_circuit.qubits)}
+        gate_map_get = gate_map.get
         
-        # Añadir mediciones
+        # Una sola pasada; las mediciones se omiten (Braket mide todos los qubits por defecto)
         for instruction in qiskit_circuit.data:
-            if instruction.operation.name == 'measure':
-                qubits = [q.index for q in instruction.qubits]
-                clbits = [c.index for c in instruction.clbits]
-                # Braket mide todos los qubits por defecto
-                pass
+            operation = instruction.operation
+            gate_class = gate_map_get(operation.name)
+            if gate_class is None:
+                continue
+            
+            qubits = [bit_index[q] for q in instruction.qubits]
+            params = operation.params
+            if params:
+                braket_circuit += gate_class(qubits[0], *[float(p) for p in params])
+            elif len(qubits) == 1:
+                braket_circuit += gate_class(qubits[0])
+            elif len(qubits) == 2:
+                braket_circuit += gate_class(qubits[0], qubits[1])
         
         return braket_circuit
-    except ImportError:
-        raise ImportError("amazon-braket-sdk no está instalado")
     except Exception as e:
         raise Exception(f"Error al convertir circuito: {e}")
@@ -10,10 +10,12 @@ Cumple con los requerimientos de corrección:
 
 import os
 import json
+import math
 import uuid
 import datetime
 import time
-import numpy as np
+import concurrent.futures
+from statistics import fmean, pstdev
 from typing import List, Dict, Any, Tuple
 from scipy import stats
 
@@ -30,13 +32,21 @@ from model.qc_metadata_model import (
     QCMetadataModel, DeviceMetadata, CircuitMetadata, CalibrationData,
     CompilationTrace, ExecutionContext, ProvenanceRecordLean, ExperimentSession
 )
+from helpers import get_utc_now, format_utc_iso
 
 # Configuración Global
 REPETITIONS = 5  # Requerimiento: 5 repeticiones por circuito
 OPTIMIZATION_LEVEL = 3  # Requerimiento: Forzar compilador
+REP_MIN_INTERVAL_S = 2.0  # Separación mínima entre inicios de repetición (s)
+SNAPSHOT_FIELDS = ("T1", "T2", "readout_error", "frequency")  # Propiedades por qubit capturadas
 
 def get_timestamp_iso():
-    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return format_utc_iso(get_utc_now())
+
+def write_bytes(filename: str, payload: bytes):
+    """Escribe el JSON serializado (se ejecuta en un hilo de fondo)."""
+    with open(filename, "wb") as f:
+        f.write(payload)
 
 # --- 1. Generación de Circuitos (Benchmarks) ---
 
@@ -89,38 +99,37 @@ def capture_device_metadata(backend) -> DeviceMetadata:
         operational_parameters={"max_shots": conf.max_shots}
     )
 
-def capture_calibration_snapshot(backend) -> CalibrationData:
+def capture_calibration_snapshot(backend, now: datetime.datetime = None) -> CalibrationData:
     """
     CRÍTICO: Captura T1, T2 y errores del momento exacto usando backend.properties().
     Requerimiento específico de la corrección.
+    `now` permite reutilizar un timestamp ya tomado (p.ej. el de compilación).
     """
     props = backend.properties()
     if not props:
         print(f"Advertencia: No se pudieron cargar propiedades para {backend.name}")
         return None
 
-    last_update = props.last_update_date.isoformat() if props.last_update_date else get_timestamp_iso()
+    if now is None:
+        now = get_utc_now()
+    timestamp = format_utc_iso(now)
+
+    last_update = format_utc_iso(props.last_update_date) if props.last_update_date else timestamp
     
-    qubit_props = {}
-    for i in range(backend.num_qubits):
-        try:
-            t1 = props.t1(i)
-            t2 = props.t2(i)
-            readout_error = props.readout_error(i)
-            qubit_props[i] = {
-                "T1": t1,
-                "T2": t2,
-                "readout_error": readout_error,
-                "frequency": props.frequency(i)
-            }
-        except Exception:
-            pass # Qubit puede estar inactivo
+    # props._qubits ya guarda {qubit: {nombre: (valor_SI, fecha)}}: una sola pasada
+    # en lugar de cuatro llamadas t1()/t2()/readout_error()/frequency() por qubit.
+    # Se omiten los qubits sin alguno de los campos (p.ej. inactivos), como antes.
+    qubit_props = {
+        i: {name: nduvs[name][0] for name in SNAPSHOT_FIELDS}
+        for i, nduvs in props._qubits.items()
+        if i < backend.num_qubits and all(name in nduvs for name in SNAPSHOT_FIELDS)
+    }
 
     return CalibrationData(
         calibration_id=str(uuid.uuid4()),
         device_id=backend.name,
-        timestamp_captured=get_timestamp_iso(),
-        valid_until=(datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)).isoformat(),
+        timestamp_captured=timestamp,
+        valid_until=format_utc_iso(now + datetime.timedelta(hours=1)),
         calibration_method="ibm_backend_properties",
         calibration_version="1.0",
         qubit_properties=qubit_props
@@ -154,52 +163,85 @@ def run_experiment_batch(service, backend_name: str):
     # Sesión global de experimento para agrupar
     session_id = str(uuid.uuid4())
     
-    for circuit_orig in benchmarks:
+    # Las escrituras de JSON se delegan a hilos para no bloquear el bucle de repeticiones
+    os.makedirs("outputs", exist_ok=True)
+    writer = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    pending_writes = []
+    
+    # El PassManager depende solo del backend: se construye una vez para toda la batería
+    pm = generate_preset_pass_manager(backend=backend, optimization_level=OPTIMIZATION_LEVEL)
+    
+    # CORRECCIÓN: Usar ejecución directa sin Session (requerido para Open Plan).
+    # El Sampler en Job Mode admite varios run(): se construye una vez y cada repetición
+    # sigue enviando su propio job
+    try:
+        sampler = Sampler(mode=backend)
+    except Exception as e:
+        print(f"Error al crear el Sampler para {backend.name}: {e}")
+        return
+    
+    # 1. Transpilación de toda la batería en una sola llamada (pm.run paraleliza listas
+    # entre núcleos); las repeticiones ejecutan el mismo circuito, así que se transpila una vez.
+    # La calibración y el timestamp de compilación se capturan justo antes de pm.run: son
+    # los que realmente vio el transpilador
+    compile_now = get_utc_now()
+    compile_ts = format_utc_iso(compile_now)
+    compile_cal = capture_calibration_snapshot(backend, compile_now)
+    start_transpile = time.time()
+    isa_circuits = pm.run(benchmarks)
+    # Duración del lote completo (la transpilación en lote no da tiempos individuales)
+    batch_transpile_dur = (time.time() - start_transpile) * 1000
+    
+    for circuit_orig, isa_circuit in zip(benchmarks, isa_circuits):
         print(f"\n>> Procesando Benchmark: {circuit_orig.name}")
         
+        # Métricas estructurales fijas durante las repeticiones: se calculan una vez.
+        # len(data) coincide con sum(count_ops().values()) (incluye barreras, a diferencia de size())
+        orig_depth = circuit_orig.depth()
+        orig_num_gates = len(circuit_orig.data)
+        isa_depth = isa_circuit.depth()
+        
+        # Metadatos del circuito y su única compilación, compartidos por todas las repeticiones
+        circ_meta = CircuitMetadata(
+            circuit_id=str(uuid.uuid4()),
+            circuit_name=circuit_orig.name,
+            algorithm_type=circuit_orig.name.split('_')[0],
+            num_qubits=circuit_orig.num_qubits,
+            circuit_depth=orig_depth,
+            num_gates=orig_num_gates,
+            timestamp_created=compile_ts
+        )
+        
+        trace_id = str(uuid.uuid4())
+        comp_trace = CompilationTrace(
+            trace_id=trace_id,
+            circuit_id=circ_meta.circuit_id,
+            device_id=backend.name,
+            calibration_id=compile_cal.calibration_id,
+            timestamp_compilation=compile_ts,
+            compiler_name="qiskit",
+            compiler_version="1.0", # Ajustar según versión real
+            compilation_duration_ms=batch_transpile_dur,
+            optimization_metrics={
+                "depth_original": orig_depth,
+                "depth_transpiled": isa_depth,
+                "n_qubits_used": isa_circuit.num_qubits,
+                # compilation_duration_ms es la del lote, no la de este circuito
+                "batch_compilation": True,
+                "batch_size": len(benchmarks),
+                "isa_circuit_reused_across_repetitions": True
+            }
+        )
+        
         for rep in range(REPETITIONS):
             print(f"   Repetición {rep+1}/{REPETITIONS}...", end="", flush=True)
             
-            # 1. Transpilación
-            start_transpile = time.time()
-            pm = generate_preset_pass_manager(backend=backend, optimization_level=OPTIMIZATION_LEVEL)
-            isa_circuit = pm.run(circuit_orig)
-            transpile_dur = (time.time() - start_transpile) * 1000
-            
-            # Metadatos del circuito y compilación
-            circ_meta = CircuitMetadata(
-                circuit_id=str(uuid.uuid4()),
-                circuit_name=circuit_orig.name,
-                algorithm_type=circuit_orig.name.split('_')[0],
-                num_qubits=circuit_orig.num_qubits,
-                circuit_depth=circuit_orig.depth(),
-                num_gates=sum(circuit_orig.count_ops().values()),
-                timestamp_created=get_timestamp_iso()
-            )
-            
-            trace_id = str(uuid.uuid4())
-            cal_data = capture_calibration_snapshot(backend) # Captura propiedades EN ESTE INSTANTE
-            
-            comp_trace = CompilationTrace(
-                trace_id=trace_id,
-                circuit_id=circ_meta.circuit_id,
-                device_id=backend.name,
-                calibration_id=cal_data.calibration_id,
-                timestamp_compilation=get_timestamp_iso(),
-                compiler_name="qiskit",
-                compiler_version="1.0", # Ajustar según versión real
-                compilation_duration_ms=transpile_dur,
-                optimization_metrics={
-                    "depth_original": circuit_orig.depth(),
-                    "depth_transpiled": isa_circuit.depth(),
-                    "n_qubits_used": isa_circuit.num_qubits
-                }
-            )
+            rep_start = time.monotonic()
+            # Calibración en el momento de la repetición: dato aparte de la de compilación
+            cal_data = capture_calibration_snapshot(backend)
 
             # 2. Ejecución
             try:
-                # CORRECCIÓN: Usar ejecución directa sin Session (requerido para Open Plan)
-                sampler = Sampler(mode=backend)
                 job = sampler.run([isa_circuit])
                 result = job.result()
                 
@@ -215,45 +257,53 @@ def run_experiment_batch(service, backend_name: str):
                 results_summary[circuit_orig.name].append(fidelity_proxy)
                 print(f" OK (Fidelity Proxy: {fidelity_proxy:.4f})")
 
-                # 3. Guardar Metadatos en Modelo
+                # 3. Guardar Metadatos en Modelo (un timestamp tras la ejecución)
+                exec_ts = get_timestamp_iso()
                 exec_ctx = ExecutionContext(
                     execution_id=job.job_id(),
                     trace_id=trace_id,
                     device_id=backend.name,
-                    calibration_id=cal_data.calibration_id,
-                    timestamp_execution=get_timestamp_iso(),
+                    calibration_id=comp_trace.calibration_id,
+                    timestamp_execution=exec_ts,
                     timestamp_compilation=comp_trace.timestamp_compilation,
                     num_shots=total_shots,
                     execution_mode="qpu",
+                    environmental_context={"execution_calibration_id": cal_data.calibration_id},
                     results={"top_measurement": most_freq_bitstring, "fidelity_proxy": fidelity_proxy}
                 )
                 
                 # Instanciar modelo completo
                 full_model = QCMetadataModel(
                     model_version="1.1",
-                    timestamp_model_created=get_timestamp_iso(),
+                    timestamp_model_created=exec_ts,
                     device_metadata=device_meta,
-                    calibration_data=[cal_data],
+                    calibration_data=[compile_cal, cal_data],
                     circuit_metadata=circ_meta,
                     compilation_trace=[comp_trace],
                     execution_context=[exec_ctx],
                     provenance_record=ProvenanceRecordLean(
                         provenance_id=str(uuid.uuid4()),
-                        timestamp_recorded=get_timestamp_iso()
+                        timestamp_recorded=exec_ts
                     )
                 )
                 
-                # Guardar JSON individual
+                # Guardar JSON individual (serialización con orjson si está disponible)
                 filename = f"outputs/metadata_{circuit_orig.name}_rep{rep}_{int(time.time())}.json"
-                os.makedirs("outputs", exist_ok=True)
-                with open(filename, "w") as f:
-                    f.write(full_model.to_complete_json())
+                pending_writes.append(writer.submit(write_bytes, filename, full_model.to_json()))
                         
             except Exception as e:
                 print(f" FALLÓ: {e}")
                 
-            # Pequeña pausa para no saturar y permitir variación temporal
-            time.sleep(2)
+            # Separación mínima entre repeticiones para no saturar y permitir variación
+            # temporal; solo se duerme lo que la espera del job no haya cubierto ya
+            remaining = REP_MIN_INTERVAL_S - (time.monotonic() - rep_start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    writer.shutdown(wait=True)
+    for future in pending_writes:
+        if future.exception():
+            print(f"Error al guardar metadatos: {future.exception()}")
 
     # --- 4. Reporte Final ---
     print("\n" + "="*50)
@@ -267,9 +317,10 @@ def run_experiment_batch(service, backend_name: str):
             print(f"{name:<25} | {'N/A':<10} | {'N/A':<10} | {'N/A':<15}")
             continue
             
-        avg = np.mean(values)
-        std = np.std(values)
-        sem = std / np.sqrt(len(values)) # Error estándar de la media
+        # statistics evita el coste de crear arrays NumPy para listas de 5 valores
+        avg = fmean(values)
+        std = pstdev(values, avg)  # Desviación poblacional (igual que np.std)
+        sem = std / math.sqrt(len(values)) # Error estándar de la media
         ic = 1.96 * sem # Intervalo de confianza 95%
         
         print(f"{name:<25} | {avg:.4f}     | {std:.4f}     | {avg:.4f} ± {ic:.4f}")
@@ -4,16 +4,25 @@ Funciones helper para los PoCs
 """
 
 import datetime
-from typing import Dict, Any, Optional
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+from typing import Dict, Any, List, Optional
+
+import numpy as np
 
 # Importaciones opcionales de Qiskit (solo si está instalado)
 try:
-    from qiskit import QuantumCircuit
+    from qiskit import QuantumCircuit, transpile
     from qiskit.circuit.library import EfficientSU2
     HAS_QISKIT = True
 except ImportError:
     HAS_QISKIT = False
     QuantumCircuit = None
+    transpile = None
     EfficientSU2 = None
 
 # Compatibilidad con diferentes versiones de Qiskit
@@ -35,6 +44,44 @@ except ImportError:
         HAS_AER = False
         Aer = None
 
+# Rutas alternativas de ejecución (se resuelven una vez al importar el módulo)
+try:
+    from qiskit import execute as _qiskit_execute  # Versiones antiguas de Qiskit
+except ImportError:
+    _qiskit_execute = None
+
+try:
+    from qiskit_aer.primitives import Sampler as AerSampler
+    HAS_AER_SAMPLER = True
+except ImportError:
+    HAS_AER_SAMPLER = False
+    AerSampler = None
+
+# SpinQ (opcional)
+try:
+    from spinqit import Circuit as SpinQCircuit, H as SpinQH, CX as SpinQCX
+    HAS_SPINQ = True
+except ImportError:
+    HAS_SPINQ = False
+    SpinQCircuit = None
+    SpinQH = None
+    SpinQCX = None
+
+# Validación JSON Schema (opcional)
+try:
+    from jsonschema.validators import validator_for
+    HAS_JSONSCHEMA = True
+except ImportError:
+    HAS_JSONSCHEMA = False
+    validator_for = None
+
+try:
+    import fastjsonschema
+    HAS_FASTJSONSCHEMA = True
+except ImportError:
+    HAS_FASTJSONSCHEMA = False
+    fastjsonschema = None
+
 
 def build_vqe_circuit_spinq(num_qubits: int = 2):
     """
@@ -47,75 +94,84 @@ def build_vqe_circuit_spinq(num_qubits: int = 2):
     Returns:
         Circuito de SpinQ
     """
-    try:
-        from spinqit import Circuit, H, CX, Ry
-        
-        circuit = Circuit()
-        q = circuit.allocateQubits(num_qubits)
-        
-        # Ansatz UCCSD simplificado para H2
-        # Versión funcional: usar solo H y CX (compuertas que sabemos que funcionan)
-        # Nota: Ry tiene sintaxis diferente, se puede agregar después cuando se confirme
-        if num_qubits == 2:
-            # Preparación del estado |01⟩ + |10⟩ (singlete)
-            circuit << (H, q[0])
-            circuit << (H, q[1])
-            # Entrelazamiento
-            circuit << (CX, [q[0], q[1]])
-            
-            # Ansatz simplificado usando solo H y CX
-            # Más compuertas Hadamard para variar el estado
-            circuit << (H, q[0])
-            circuit << (H, q[1])
-            # Más entrelazamiento
-            circuit << (CX, [q[0], q[1]])
-            circuit << (CX, [q[1], q[0]])
-            # Finalizar con Hadamard
-            circuit << (H, q[0])
-        
-        return circuit
-    except ImportError:
+    if not HAS_SPINQ:
         raise ImportError("spinqit no está instalado. Instala con: pip install spinqit")
+    
+    circuit = SpinQCircuit()
+    q = circuit.allocateQubits(num_qubits)
+    
+    # Ansatz UCCSD simplificado para H2
+    # Versión funcional: usar solo H y CX (compuertas que sabemos que funcionan)
+    # Nota: Ry tiene sintaxis diferente, se puede agregar después cuando se confirme
+    if num_qubits == 2:
+        # Preparación del estado |01⟩ + |10⟩ (singlete)
+        circuit << (SpinQH, q[0])
+        circuit << (SpinQH, q[1])
+        # Entrelazamiento
+        circuit << (SpinQCX, [q[0], q[1]])
+        
+        # Ansatz simplificado usando solo H y CX
+        # Más compuertas Hadamard para variar el estado
+        circuit << (SpinQH, q[0])
+        circuit << (SpinQH, q[1])
+        # Más entrelazamiento
+        circuit << (SpinQCX, [q[0], q[1]])
+        circuit << (SpinQCX, [q[1], q[0]])
+        # Finalizar con Hadamard
+        circuit << (SpinQH, q[0])
+    
+    return circuit
+
+
+def _build_vqe_h2() -> "QuantumCircuit":
+    """Construye el ansatz UCCSD simplificado de 2 qubits para H2 (base sto-3g)"""
+    circuit = QuantumCircuit(2)
+    
+    # Preparación del estado |01⟩ + |10⟩ (singlete)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    
+    # Ansatz UCCSD simplificado
+    # Rotación en qubit 0
+    circuit.ry(0.5, 0)
+    # Entrelazamiento
+    circuit.cx(0, 1)
+    # Rotación en qubit 1
+    circuit.ry(0.3, 1)
+    # Más entrelazamiento
+    circuit.cx(1, 0)
+    circuit.ry(0.2, 0)
+    return circuit
+
+
+# Plantillas VQE ya construidas: num_qubits -> circuito (se construyen una vez)
+_VQE_TEMPLATES: Dict[int, Any] = {}
 
 
 def build_vqe_circuit(num_qubits: int = 2):
     """
     Construye un circuito VQE simple para H2
     Usa EfficientSU2 como ansatz básico
+    Las plantillas se construyen una sola vez; se devuelve una copia para que
+    el llamador pueda modificarla (p.ej. measure_all) sin afectar a la caché
     """
     if not HAS_QISKIT:
         raise ImportError("Qiskit no está instalado. Instala con: pip install qiskit")
     
-    circuit = QuantumCircuit(num_qubits)
+    template = _VQE_TEMPLATES.get(num_qubits)
+    if template is None:
+        # Para H2 en base sto-3g, necesitamos 2 qubits; para más qubits, usar EfficientSU2
+        template = _build_vqe_h2() if num_qubits == 2 else EfficientSU2(num_qubits, reps=2)
+        _VQE_TEMPLATES[num_qubits] = template
     
-    # Ansatz UCCSD simplificado para H2
-    # Para H2 en base sto-3g, necesitamos 2 qubits
-    if num_qubits == 2:
-        # Preparación del estado |01⟩ + |10⟩ (singlete)
-        circuit.h(0)
-        circuit.cx(0, 1)
-        
-        # Ansatz UCCSD simplificado
-        # Rotación en qubit 0
-        circuit.ry(0.5, 0)
-        # Entrelazamiento
-        circuit.cx(0, 1)
-        # Rotación en qubit 1
-        circuit.ry(0.3, 1)
-        # Más entrelazamiento
-        circuit.cx(1, 0)
-        circuit.ry(0.2, 0)
-    else:
-        # Para más qubits, usar EfficientSU2
-        ansatz = EfficientSU2(num_qubits, reps=2)
-        circuit = ansatz
-    
-    return circuit
+    return template.copy()
 
 
+@functools.lru_cache(maxsize=8)
 def get_aer_backend(backend_name: str = 'qasm_simulator'):
     """
     Obtiene un backend de Aer compatible con diferentes versiones de Qiskit
+    La instancia se cachea por nombre (evita la búsqueda en el registro de Aer en cada llamada)
     
     Args:
         backend_name: Nombre del backend (default: 'qasm_simulator')
@@ -132,73 +188,134 @@ def get_aer_backend(backend_name: str = 'qasm_simulator'):
     return Aer.get_backend(backend_name)
 
 
-def simulate_vqe_execution(circuit: QuantumCircuit, shots: int = 1024) -> Dict[str, Any]:
+def _run_aer_backend(circuits_to_run: List, shots: int) -> List[Dict[str, int]]:
+    """Ejecuta con backend.run() de Aer (Qiskit 1.0+) en un único job para todos los circuitos"""
+    job = get_aer_backend('qasm_simulator').run(circuits_to_run, shots=shots)
+    result = job.result()
+    return [result.get_counts(i) for i in range(len(circuits_to_run))]
+
+
+def _run_qiskit_execute(circuits_to_run: List, shots: int) -> List[Dict[str, int]]:
+    """Ejecuta con execute() (versiones antiguas de Qiskit, backend sin run())"""
+    job = _qiskit_execute(circuits_to_run, get_aer_backend('qasm_simulator'), shots=shots)
+    result = job.result()
+    return [result.get_counts(i) for i in range(len(circuits_to_run))]
+
+
+# Tamaño máximo (en qubits) de las tablas de bitstrings precalculadas (2^n cadenas por tabla)
+_BITSTRING_TABLE_MAX_QUBITS = 16
+
+
+@functools.lru_cache(maxsize=32)
+def _bitstring_table(num_qubits: int) -> tuple:
+    """Tabla índice de estado -> bitstring de `num_qubits` bits"""
+    return tuple(format(i, f'0{num_qubits}b') for i in range(1 << num_qubits))
+
+
+def bitstrings(indices, num_qubits: int) -> List[str]:
     """
-    Simula la ejecución de un circuito VQE
-    Retorna un diccionario con resultados simulados
-    Compatible con diferentes versiones de Qiskit
+    Convierte índices de estado a bitstrings de `num_qubits` bits
+    
+    Args:
+        indices: Índices enteros de estado (iterable)
+        num_qubits: Número de bits de cada bitstring
+    
+    Returns:
+        Lista de bitstrings, en el orden de `indices`
     """
-    # Crear una copia del circuito y añadir mediciones si no las tiene
-    circuit_to_run = circuit.copy()
+    # Tabla precalculada para pocos qubits; por encima, format() directo
+    if num_qubits <= _BITSTRING_TABLE_MAX_QUBITS:
+        table = _bitstring_table(num_qubits)
+        return [table[i] for i in indices]
+    return [format(i, f'0{num_qubits}b') for i in indices]
+
+
+def _run_aer_sampler(circuits_to_run: List, shots: int) -> List[Dict[str, int]]:
+    """Ejecuta con el Sampler (V1) de qiskit_aer.primitives y convierte quasi_dists a counts"""
+    if not HAS_AER_SAMPLER:
+        raise ImportError("qiskit_aer.primitives.Sampler no está disponible")
+    sampler = AerSampler()
+    job = sampler.run(circuits_to_run, shots=shots)
+    result = job.result()
+    # Convertir resultados (una distribución por circuito)
+    if not hasattr(result, 'quasi_dists'):
+        return [{"00": shots // 2, "01": shots // 2} for _ in circuits_to_run]
+    
+    counts_list = []
+    for circuit_to_run, qdist in zip(circuits_to_run, result.quasi_dists):
+        states = bitstrings(qdist.keys(), circuit_to_run.num_qubits)
+        counts_list.append(dict(zip(states, (int(prob * shots) for prob in qdist.values()))))
+    return counts_list
+
+
+# Ejecutores disponibles por modo
+_RUNNERS = {
+    'aer_run': _run_aer_backend,
+    'execute': _run_qiskit_execute,
+    'sampler': _run_aer_sampler,
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _run_mode() -> str:
+    """
+    Detecta una sola vez (en la primera simulación) qué API de ejecución ofrece la instalación,
+    en lugar de descubrirlo capturando excepciones en cada llamada
+    """
+    if HAS_AER:
+        if hasattr(get_aer_backend('qasm_simulator'), 'run'):
+            return 'aer_run'
+        if _qiskit_execute is not None:
+            return 'execute'
+    return 'sampler'
+
+
+def _measured_circuit(circuit):
+    """
+    Retorna el circuito con mediciones. Si el circuito ya mide, se usa tal cual sin
+    copiarlo; si no, se añaden las mediciones sobre una copia.
+    """
+    if circuit.num_clbits > 0:
+        return circuit
+    
+    measured = circuit.copy()
+    measured.measure_all()
+    return measured
     
-    # Verificar si el circuito tiene bits clásicos y mediciones
-    if circuit_to_run.num_clbits == 0:
-        # Añadir bits clásicos y mediciones
-        circuit_to_run.measure_all()
+    # Añadir bits clásicos y mediciones sobre una copia
+    measured = circuit.copy()
+    measured.measure_all()
+    if key is not None:
+        if len(_MEASURED_CACHE) >= _MEASURED_CACHE_MAX:
+            del _MEASURED_CACHE[next(iter(_MEASURED_CACHE))]  # Descarta la entrada más antigua
+        _MEASURED_CACHE[key] = measured
+    return measured
+
+
+def simulate_vqe_executions(circuits: List, shots: int = 1024) -> List[Dict[str, Any]]:
+    """
+    Simula la ejecución de varios circuitos VQE en un único job de Aer
+    (amortiza el coste fijo por llamada del simulador en bucles de optimización)
     
-    # Intentar usar Aer directamente (método más compatible)
+    Args:
+        circuits: Lista de circuitos cuánticos
+        shots: Número de shots por circuito
+    
+    Returns:
+        Lista de diccionarios con resultados simulados (uno por circuito, en el mismo orden)
+    """
+    # Solo se copia (y se añaden mediciones) si el circuito no tiene bits clásicos
+    circuits_to_run = [_measured_circuit(circuit) for circuit in circuits]
+    
+    run_mode = _run_mode()
     try:
-        simulator = get_aer_backend('qasm_simulator')
-        
-        # Intentar usar el método moderno de Aer (Qiskit 1.0+)
-        try:
-            # Qiskit 1.0+ usa run() directamente
-            job = simulator.run(circuit_to_run, shots=shots)
-            result = job.result()
-            counts = result.get_counts(circuit_to_run)
-        except AttributeError:
-            # Fallback: intentar con execute (versiones antiguas)
-            try:
-                from qiskit import execute
-                job = execute(circuit_to_run, simulator, shots=shots)
-                result = job.result()
-                counts = result.get_counts(circuit_to_run)
-            except ImportError:
-                # Si execute no existe, usar primitives
-                from qiskit.primitives import Sampler
-                from qiskit_aer.primitives import Sampler as AerSampler
-                sampler = AerSampler()
-                job = sampler.run(circuit_to_run, shots=shots)
-                result = job.result()
-                # Convertir resultados
-                counts = {}
-                if hasattr(result, 'quasi_dists'):
-                    quasi_dists = result.quasi_dists
-                    for qdist in quasi_dists:
-                        for state, prob in qdist.items():
-                            state_str = format(state, f'0{circuit_to_run.num_qubits}b')
-                            counts[state_str] = int(prob * shots)
-                else:
-                    counts = {"00": shots // 2, "01": shots // 2}
-        
+        counts_list = _RUNNERS[run_mode](circuits_to_run, shots)
     except Exception as e:
-        # Último fallback: usar primitives de Qiskit
+        # Último fallback: usar primitives de Aer
         try:
-            from qiskit.primitives import Sampler
-            from qiskit_aer.primitives import Sampler as AerSampler
-            sampler = AerSampler()
-            job = sampler.run(circuit_to_run, shots=shots)
-            result = job.result()
-            # Convertir resultados
-            counts = {}
-            if hasattr(result, 'quasi_dists'):
-                quasi_dists = result.quasi_dists
-                for qdist in quasi_dists:
-                    for state, prob in qdist.items():
-                        state_str = format(state, f'0{circuit_to_run.num_qubits}b')
-                        counts[state_str] = int(prob * shots)
-            else:
-                counts = {"00": shots // 2, "01": shots // 2}
+            if run_mode == 'sampler':
+                raise
+            counts_list = _run_aer_sampler(circuits_to_run, shots)
         except Exception as e2:
             raise Exception(
                 f"Error al ejecutar circuito: {e2}\n"
@@ -206,18 +323,36 @@ def simulate_vqe_execution(circuit: QuantumCircuit, shots: int = 1024) -> Dict[s
                 f"Asegúrate de tener qiskit-aer instalado: pip install qiskit-aer"
             )
     
+    job_id = f"job_sim_{_id_timestamp(datetime.datetime.now())}"
+    
     # Calcular energía estimada (simulada)
     # Para H2, la energía del estado base es aproximadamente -1.137
     # Simulamos una convergencia hacia ese valor
-    estimated_energy = -1.137 + (0.1 * (1 - len(counts) / shots))
-    
-    return {
-        "counts": counts,
-        "shots": shots,
-        "estimated_energy": estimated_energy,
-        "success": True,
-        "job_id": f"job_sim_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    }
+    return [
+        {
+            "counts": counts,
+            "shots": shots,
+            "estimated_energy": -1.137 + (0.1 * (1 - len(counts) / shots)),
+            "success": True,
+            "job_id": job_id
+        }
+        for counts in counts_list
+    ]
+
+
+def simulate_vqe_execution(circuit: QuantumCircuit, shots: int = 1024) -> Dict[str, Any]:
+    """
+    Simula la ejecución de un circuito VQE
+    Retorna un diccionario con resultados simulados
+    Compatible con diferentes versiones de Qiskit
+    """
+    return simulate_vqe_executions([circuit], shots)[0]
+
+
+@functools.lru_cache(maxsize=16)
+def _qubit_labels(num_qubits: int) -> tuple:
+    """Etiquetas 'q0'..'q{n-1}' usadas como claves de fidelidades por qubit"""
+    return tuple(f"q{i}" for i in range(num_qubits))
 
 
 def fetch_new_calibration(device_metadata, hours_valid: int = 4) -> Any:
@@ -230,11 +365,13 @@ def fetch_new_calibration(device_metadata, hours_valid: int = 4) -> Any:
     now = get_utc_now()
     valid_until = now + datetime.timedelta(hours=hours_valid)
     
+    num_qubits = device_metadata.num_qubits
+    
     calibration = CalibrationData(
-        calibration_id=f"cal_{device_metadata.device_id}_{now.strftime('%Y%m%d_%H%M%S')}",
+        calibration_id=f"cal_{device_metadata.device_id}_{_id_timestamp(now)}",
         device_id=device_metadata.device_id,
-        timestamp_captured=now.isoformat() + "Z",
-        valid_until=valid_until.isoformat() + "Z",
+        timestamp_captured=format_utc_iso(now),
+        valid_until=format_utc_iso(valid_until),
         calibration_method="ibm_quantum_api",
         calibration_version="1.0",
         qubit_properties={
@@ -243,10 +380,10 @@ def fetch_new_calibration(device_metadata, hours_valid: int = 4) -> Any:
                 "t2_us": 50.0 + (i * 2.0),
                 "readout_error": 0.01 + (i * 0.001)
             }
-            for i in range(device_metadata.num_qubits)
+            for i in range(num_qubits)
         },
         gate_fidelities={
-            "1q_gates": {f"q{i}": 0.999 for i in range(device_metadata.num_qubits)},
+            "1q_gates": dict.fromkeys(_qubit_labels(num_qubits), 0.999),
             "2q_gates": {}
         },
         crosstalk_matrix={}
@@ -260,10 +397,27 @@ def fetch_temp() -> float:
     return 0.015  # 15 mK típico para IBM
 
 
+# Generadores de números aleatorios creados una sola vez para la telemetría simulada
+_rng = random.Random()
+_np_rng = np.random.default_rng()
+
+
 def fetch_system_load() -> float:
     """Simula obtener carga del sistema"""
-    import random
-    return random.uniform(20.0, 80.0)
+    return _rng.uniform(20.0, 80.0)
+
+
+def fetch_system_load_bulk(n: int) -> np.ndarray:
+    """
+    Simula obtener n muestras de carga del sistema en una sola llamada vectorizada
+    
+    Args:
+        n: Número de muestras
+    
+    Returns:
+        Array de NumPy con n cargas (%) en [20.0, 80.0)
+    """
+    return _np_rng.uniform(20.0, 80.0, n)
 
 
 def get_circuit_qasm(circuit: QuantumCircuit) -> str:
@@ -285,6 +439,91 @@ def get_circuit_qasm(circuit: QuantumCircuit) -> str:
         return circuit.qasm()
 
 
+def _circuit_digest(circuit) -> bytes:
+    """Huella estructural del circuito: blake2b (16 bytes) de su QASM"""
+    return hashlib.blake2b(get_circuit_qasm(circuit).encode(), digest_size=16).digest()
+
+
+# Circuitos ya transpilados: (hash QASM, backend, nivel, seed, kwargs) -> (circuito, QASM compilado)
+_TRANSPILE_CACHE: Dict[tuple, tuple] = {}
+
+
+def _backend_name(backend) -> str:
+    """Nombre del backend (método en BackendV1, propiedad en BackendV2)"""
+    name = getattr(backend, 'name', None)
+    return name() if callable(name) else str(name)
+
+
+def cached_transpile_with_qasm(circuit, backend, optimization_level: int = 1, seed_transpiler: int = 42, **kwargs) -> tuple:
+    """
+    Transpila un circuito reutilizando el resultado si ya se compiló con las mismas entradas
+    En los bucles JIT sobre el simulador la recalibración no llega al pass manager
+    (no se pasan backend_properties), así que recompilar el mismo circuito es coste puro.
+    Junto al circuito se cachea su QASM, que se genera una sola vez por compilación
+    
+    El circuito devuelto se comparte entre llamadas: no debe modificarse in-place
+    
+    Args:
+        circuit: Circuito cuántico a transpilar
+        backend: Backend destino
+        optimization_level: Nivel de optimización de transpile()
+        seed_transpiler: Semilla del transpilador
+        **kwargs: Argumentos adicionales de transpile() (basis_gates, coupling_map, ...)
+    
+    Returns:
+        Tupla (circuito transpilado, QASM del circuito transpilado, cache_hit), donde cache_hit
+        indica que no se ejecutó transpile() y se reutilizó una compilación anterior
+    """
+    if not HAS_QISKIT:
+        raise ImportError("Qiskit no está instalado. Instala con: pip install qiskit")
+    
+    # Los kwargs (basis_gates, coupling_map, ...) entran en la clave por su repr
+    key = (
+        _circuit_digest(circuit),
+        _backend_name(backend),
+        optimization_level,
+        seed_transpiler,
+        tuple(sorted((k, repr(v)) for k, v in kwargs.items())),
+    )
+    entry = _TRANSPILE_CACHE.get(key)
+    if entry is not None:
+        return entry[0], entry[1], True
+    
+    compiled = transpile(circuit, backend=backend, optimization_level=optimization_level,
+                         seed_transpiler=seed_transpiler, **kwargs)
+    entry = (compiled, get_circuit_qasm(compiled))
+    _TRANSPILE_CACHE[key] = entry
+    return entry[0], entry[1], False
+
+
+def cached_transpile(circuit, backend, optimization_level: int = 1, seed_transpiler: int = 42, **kwargs):
+    """
+    Como cached_transpile_with_qasm(), pero retorna solo el circuito transpilado
+    """
+    return cached_transpile_with_qasm(circuit, backend, optimization_level, seed_transpiler, **kwargs)[0]
+
+
+def needs_transpile(backend) -> bool:
+    """
+    Indica si el backend requiere transpilar los circuitos antes de ejecutarlos
+    Un simulador ideal (sin coupling map) acepta el circuito tal cual, y transpilarlo
+    no acelera la simulación
+    
+    Args:
+        backend: Backend destino
+    
+    Returns:
+        False para simuladores sin restricciones de conectividad; True en otro caso
+    """
+    configuration = getattr(backend, 'configuration', None)
+    config = configuration() if callable(configuration) else None
+    return not (getattr(config, 'simulator', False) and getattr(config, 'coupling_map', None) is None)
+
+
+# Zona UTC resuelta una vez: datetime.UTC (Python 3.11+) o timezone.utc (versiones anteriores)
+_UTC = getattr(datetime, "UTC", datetime.timezone.utc)
+
+
 def get_utc_now() -> datetime.datetime:
     """
     Obtiene la fecha/hora actual en UTC
@@ -294,12 +533,7 @@ def get_utc_now() -> datetime.datetime:
     Returns:
         datetime en UTC
     """
-    try:
-        # Python 3.11+
-        return datetime.datetime.now(datetime.UTC)
-    except AttributeError:
-        # Python < 3.11
-        return datetime.datetime.now(datetime.timezone.utc)
+    return datetime.datetime.now(_UTC)
 
 
 def get_utc_now_iso() -> str:
@@ -310,14 +544,41 @@ def get_utc_now_iso() -> str:
     Returns:
         String ISO 8601 en UTC con 'Z' al final
     """
-    dt = get_utc_now()
-    # Si ya tiene timezone, usar replace para quitar el timezone y añadir Z
-    if dt.tzinfo is not None:
-        # Convertir a naive datetime y añadir Z
-        dt_naive = dt.replace(tzinfo=None)
-        return dt_naive.isoformat() + "Z"
-    else:
-        return dt.isoformat() + "Z"
+    return format_utc_iso(datetime.datetime.now(_UTC))
+
+
+def format_utc_iso(dt: datetime.datetime) -> str:
+    """
+    Formatea un datetime como YYYY-MM-DDTHH:MM:SS.ssssssZ (formato único de los timestamps exportados)
+    Un datetime naive se asume UTC; uno con otra zona horaria se convierte a UTC
+    """
+    if dt.utcoffset():
+        dt = dt.astimezone(_UTC)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond:06d}Z"
+
+
+def _id_timestamp(dt: datetime.datetime) -> str:
+    """
+    Sufijo temporal YYYYmmdd_HHMMSS para IDs (equivale a strftime('%Y%m%d_%H%M%S'),
+    formateando directamente los campos enteros)
+    """
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
+# Passes conocidos de Qiskit (orden de ejecución):
+# (nombre, factor de duración, factor de puertas acumulado, factor de profundidad
+#  sobre el original, error estimado, parámetros). Factor de puertas None: estado final
+_PASS_SPECS = (
+    ("Unroll3qOrMore", 1.2, 1.0, 1.0, 0.10, {"basis_gates": ["u", "cx"], "target_basis": "universal"}),
+    ("TrivialLayout", 0.8, 0.95, 1.0, 0.10, {"method": "trivial", "coupling_map": None}),
+    ("FullAncillaAllocation", 0.5, 1.0, 1.0, 0.10, {"ancilla_qubits": []}),
+    ("EnlargeWithAncilla", 0.5, 1.0, 1.0, 0.10, {}),
+    ("RemoveResetInZeroState", 0.6, 0.9, 0.9, 0.09, {}),
+    ("ApplyLayout", 1.0, 1.0, 0.9, 0.09, {"layout_method": "trivial"}),
+    ("Optimize1qGates", 1.5, 0.85, 0.7, 0.08, {"optimization_level": 3, "basis_gates": ["u"]}),
+    ("CXDirection", 0.7, 1.0, 0.7, 0.08, {"coupling_map": None}),
+    ("RemoveDiagonalGatesBeforeMeasure", 0.8, None, None, 0.05, {}),
+)
 
 
 def extract_compilation_passes(compiled_circuit, original_circuit=None, compilation_duration_ms=0.0):
@@ -337,178 +598,56 @@ def extract_compilation_passes(compiled_circuit, original_circuit=None, compilat
     # Solución: Crear estructura detallada basada en passes conocidos de Qiskit
     
     # Calcular métricas del circuito compilado
-    compiled_gates = len(compiled_circuit.data) if hasattr(compiled_circuit, 'data') else 0
-    compiled_depth = compiled_circuit.depth() if hasattr(compiled_circuit, 'depth') else 0
+    compiled_gates = len(compiled_circuit.data)
+    compiled_depth = compiled_circuit.depth()
     
     # Calcular métricas del circuito original si está disponible
-    if original_circuit:
-        original_gates = len(original_circuit.data) if hasattr(original_circuit, 'data') else 0
-        original_depth = original_circuit.depth() if hasattr(original_circuit, 'depth') else 0
+    if original_circuit is None:
+        original_gates, original_depth = compiled_gates, compiled_depth
     else:
-        original_gates = compiled_gates
-        original_depth = compiled_depth
+        original_gates, original_depth = len(original_circuit.data), original_circuit.depth()
     
     # Distribuir tiempo de compilación entre passes (estimado)
-    num_passes = 9
-    avg_pass_duration = compilation_duration_ms / num_passes if num_passes > 0 else 0
-    
-    # Crear lista de passes detallados
-    passes_detail = []
-    
-    # Pass 1: Unroll3qOrMore
-    passes_detail.append({
-        "pass_name": "Unroll3qOrMore",
-        "pass_order": 1,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 1.2,
-        "parameters": {
-            "basis_gates": ["u", "cx"],
-            "target_basis": "universal"
-        },
-        "circuit_state_after_pass": {
-            "num_gates": original_gates,
-            "circuit_depth": original_depth,
-            "estimated_error": 0.10
-        }
-    })
-    
-    # Pass 2: TrivialLayout
-    gates_after = int(original_gates * 0.95)
-    passes_detail.append({
-        "pass_name": "TrivialLayout",
-        "pass_order": 2,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.8,
-        "parameters": {
-            "method": "trivial",
-            "coupling_map": None
-        },
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": original_depth,
-            "estimated_error": 0.10
-        }
-    })
-    
-    # Pass 3: FullAncillaAllocation
-    passes_detail.append({
-        "pass_name": "FullAncillaAllocation",
-        "pass_order": 3,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.5,
-        "parameters": {
-            "ancilla_qubits": []
-        },
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": original_depth,
-            "estimated_error": 0.10
-        }
-    })
-    
-    # Pass 4: EnlargeWithAncilla
-    passes_detail.append({
-        "pass_name": "EnlargeWithAncilla",
-        "pass_order": 4,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.5,
-        "parameters": {},
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": original_depth,
-            "estimated_error": 0.10
-        }
-    })
-    
-    # Pass 5: RemoveResetInZeroState
-    gates_after = int(gates_after * 0.9)
-    passes_detail.append({
-        "pass_name": "RemoveResetInZeroState",
-        "pass_order": 5,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.6,
-        "parameters": {},
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": int(original_depth * 0.9),
-            "estimated_error": 0.09
-        }
-    })
-    
-    # Pass 6: ApplyLayout
-    passes_detail.append({
-        "pass_name": "ApplyLayout",
-        "pass_order": 6,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 1.0,
-        "parameters": {
-            "layout_method": "trivial"
-        },
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": int(original_depth * 0.9),
-            "estimated_error": 0.09
-        }
-    })
-    
-    # Pass 7: Optimize1qGates
-    gates_after = int(gates_after * 0.85)
-    depth_after = int(original_depth * 0.7)
-    passes_detail.append({
-        "pass_name": "Optimize1qGates",
-        "pass_order": 7,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 1.5,
-        "parameters": {
-            "optimization_level": 3,
-            "basis_gates": ["u"]
-        },
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": depth_after,
-            "estimated_error": 0.08
-        }
-    })
-    
-    # Pass 8: CXDirection
-    passes_detail.append({
-        "pass_name": "CXDirection",
-        "pass_order": 8,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.7,
-        "parameters": {
-            "coupling_map": None
-        },
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": depth_after,
-            "estimated_error": 0.08
-        }
-    })
-    
-    # Pass 9: RemoveDiagonalGatesBeforeMeasure
-    gates_after = compiled_gates
-    depth_after = compiled_depth
-    passes_detail.append({
-        "pass_name": "RemoveDiagonalGatesBeforeMeasure",
-        "pass_order": 9,
-        "status": "completed",
-        "duration_ms": avg_pass_duration * 0.8,
-        "parameters": {},
-        "circuit_state_after_pass": {
-            "num_gates": gates_after,
-            "circuit_depth": depth_after,
-            "estimated_error": 0.05
+    avg_pass_duration = compilation_duration_ms / len(_PASS_SPECS)
+    
+    # Crear lista de passes detallados; el nº de puertas se reduce de forma acumulada
+    passes_detail = [None] * len(_PASS_SPECS)
+    gates_after = original_gates
+    for index, (name, duration_factor, gate_factor, depth_factor, error, parameters) in enumerate(_PASS_SPECS):
+        if gate_factor is None:
+            # Último pass: estado final = circuito compilado
+            gates_after, depth_after = compiled_gates, compiled_depth
+        else:
+            if gate_factor != 1.0:
+                gates_after = int(gates_after * gate_factor)
+            depth_after = original_depth if depth_factor == 1.0 else int(original_depth * depth_factor)
+        
+        passes_detail[index] = {
+            "pass_name": name,
+            "pass_order": index + 1,
+            "status": "completed",
+            "duration_ms": avg_pass_duration * duration_factor,
+            "parameters": dict(parameters),
+            "circuit_state_after_pass": {
+                "num_gates": gates_after,
+                "circuit_depth": depth_after,
+                "estimated_error": error
+            }
         }
-    })
     
     return passes_detail
 
 
+# Offset explícito seguido de un '+00:00' añadido de más (p.ej. '-03:00+00:00' o '-0300+00:00')
+_DUPLICATED_UTC_OFFSET = re.compile(r'([+-]\d{2}:?\d{2})\+00:00$')
+
+
+@functools.lru_cache(maxsize=1024)
 def parse_iso_timestamp(iso_string: str) -> datetime.datetime:
     """
     Parsea un string ISO 8601 a datetime
     Maneja formatos con 'Z' o con timezone explícito
+    Cacheado: los timestamps de calibración se repiten y datetime es inmutable
     
     Args:
         iso_string: String ISO 8601 (p.ej., '2025-11-13T19:03:24.528222Z' o '2025-11-13T19:03:24.528222+00:00')
@@ -518,38 +657,95 @@ def parse_iso_timestamp(iso_string: str) -> datetime.datetime:
     """
     # Normalizar el string: quitar 'Z' y reemplazar con '+00:00' si es necesario
     if iso_string.endswith('Z'):
-        # Reemplazar 'Z' con '+00:00'
         iso_string = iso_string[:-1] + '+00:00'
     
-    # Manejo de timezone duplicado o malformado (ej: ...-03:00+00:00)
-    # Si el string termina en +00:00 y tiene otro offset antes, quitamos el +00:00
-    if iso_string.endswith('+00:00'):
-        # Verificar si hay otro indicador de zona horaria antes
-        # Buscamos '+' o '-' en los últimos 12 caracteres (excluyendo el final +00:00)
-        # Un offset normal es -XX:XX o +XX:XX (6 chars)
-        pre_suffix = iso_string[:-6]
-        if len(pre_suffix) > 6 and (pre_suffix[-6] in ['+', '-'] or pre_suffix[-5] in ['+', '-']):
-             # Parece haber otro offset, así que el +00:00 final es redundante/erróneo
-             iso_string = pre_suffix
-
-    # Parsear
+    # Parsear: camino directo con fromisoformat; solo si falla se repara el offset
     try:
         dt = datetime.datetime.fromisoformat(iso_string)
-        # Asegurar que esté en UTC
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=datetime.timezone.utc)
-        return dt
-    except ValueError as e:
-        raise ValueError(f"Error al parsear timestamp '{iso_string}': {e}")
+    except ValueError:
+        # Manejo de timezone duplicado o malformado (ej: ...-03:00+00:00):
+        # si hay otro offset antes del +00:00 final, este es redundante/erróneo
+        iso_string = _DUPLICATED_UTC_OFFSET.sub(r'\1', iso_string)
+        try:
+            dt = datetime.datetime.fromisoformat(iso_string)
+        except ValueError as e:
+            raise ValueError(f"Error al parsear timestamp '{iso_string}': {e}")
+    
+    # Asegurar que esté en UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+# Esquema JSON del modelo de metadatos v1.1
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model", "schema_qc_metadata_v1.1.json")
+
+
+def _load_schema(schema_path: str) -> Dict[str, Any]:
+    """Lee un esquema JSON desde disco"""
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=4)
+def get_schema_validator(schema_path: str = SCHEMA_PATH):
+    """
+    Obtiene un validador jsonschema para el esquema del modelo
+    El esquema se carga, se comprueba y se compila una sola vez por ruta
+    
+    Args:
+        schema_path: Ruta del esquema JSON (default: esquema v1.1 del modelo)
+    
+    Returns:
+        Instancia del validador (usar .validate(instancia))
+    """
+    if not HAS_JSONSCHEMA:
+        raise ImportError("jsonschema no está instalado. Instala con: pip install jsonschema")
+    
+    schema = _load_schema(schema_path)
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_fast_schema_validate(schema_path: str):
+    """Función de validación generada por fastjsonschema (se compila una vez por ruta)"""
+    return fastjsonschema.compile(_load_schema(schema_path))
+
+
+def validate_metadata_schema(instance: Dict[str, Any], schema_path: str = SCHEMA_PATH) -> None:
+    """
+    Valida un diccionario del modelo (p.ej. QCMetadataModel.to_dict()) contra el esquema
+    Usa fastjsonschema si está instalado (validador generado como código Python);
+    si no, el validador jsonschema precompilado
+    
+    Args:
+        instance: Diccionario a validar
+        schema_path: Ruta del esquema JSON (default: esquema v1.1 del modelo)
+    
+    Raises:
+        ImportError: si no hay ninguna librería de validación instalada
+        Exception: error de validación de la librería usada
+    """
+    if HAS_FASTJSONSCHEMA:
+        _get_fast_schema_validate(schema_path)(instance)
+    else:
+        get_schema_validator(schema_path).validate(instance)
 
 
 # ============================================================
 # FUNCIONES PARA PROVEEDORES EN LA NUBE
 # ============================================================
 
+# cloud_providers se importa dentro de cada función: los PoCs que solo usan Aer
+# no pagan su carga al importar helpers
+
+@functools.lru_cache(maxsize=4)
 def get_ibm_provider(token: Optional[str] = None, instance: Optional[str] = None):
     """
     Obtiene un proveedor de IBM Quantum
+    Se reutiliza la misma instancia (y su autenticación y cachés) para el mismo token/instancia
     
     Args:
         token: Token de API de IBM Quantum (opcional)
@@ -562,9 +758,11 @@ def get_ibm_provider(token: Optional[str] = None, instance: Optional[str] = None
     return IBMProvider(token=token, instance=instance)
 
 
+@functools.lru_cache(maxsize=4)
 def get_aws_braket_provider(aws_profile: Optional[str] = None, region: str = "us-east-1"):
     """
     Obtiene un proveedor de AWS Braket
+    Se reutiliza la misma instancia (y su sesión y cachés) para el mismo perfil/región
     
     Args:
         aws_profile: Perfil de AWS (opcional)
@@ -615,8 +813,8 @@ def execute_on_aws_braket(circuit_qiskit, device_arn: str, shots: int = 1024,
     Returns:
         Diccionario con resultados
     """
-    from cloud_providers import convert_qiskit_to_braket, AWSBraketProvider
+    from cloud_providers import convert_qiskit_to_braket
     
-    provider = AWSBraketProvider(aws_profile=aws_profile, region=region)
+    provider = get_aws_braket_provider(aws_profile=aws_profile, region=region)
     circuit_braket = convert_qiskit_to_braket(circuit_qiskit)
     return provider.execute_circuit(circuit_braket, device_arn, shots=shots, **kwargs)
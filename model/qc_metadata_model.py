@@ -5,11 +5,70 @@ Implementación de las clases principales del modelo de metadatos
 """
 
 import json
+import sys
 import datetime
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, field, asdict
+import functools
+from typing import Dict, Iterable, List, Optional, Any, Union
+from dataclasses import dataclass, field, fields
 from enum import Enum
 
+# Serializador JSON rápido opcional
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
+
+# slots=True (Python 3.10+): sin __dict__ por instancia en las entidades del modelo
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _to_json_bytes(obj: Any) -> bytes:
+    """
+    Serializa un dataclass del modelo a JSON (bytes UTF-8)
+    Usa orjson si está instalado (serializa dataclasses de forma nativa);
+    si no, recurre a json estándar
+    """
+    if HAS_ORJSON:
+        # OPT_NON_STR_KEYS: qubit_properties usa claves int (json las convierte a str)
+        # OPT_SERIALIZE_NUMPY: valores numpy que llegan desde los SDKs
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj.to_dict(), ensure_ascii=False).encode("utf-8")
+
+
+def _now_utc() -> datetime.datetime:
+    """Fecha/hora actual en UTC (aware)"""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime.datetime:
+    """
+    Parsea un timestamp ISO 8601 del modelo (admite sufijo 'Z')
+    Cacheado por string: los timestamps se repiten (mirrors) entre entidades
+    """
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _fast_to_dict(cls):
+    """
+    Decorador: genera un to_dict especializado para el dataclass (campo -> valor)
+    El cuerpo se compila una vez con los campos escritos literalmente, sin bucle ni
+    getattr, y sin la copia profunda de asdict: los valores anidados (dicts,
+    listas, QASM) se comparten con la instancia. Los campos '_' (cachés) se omiten
+    """
+    names = [f.name for f in fields(cls) if not f.name.startswith('_')]
+    items = ", ".join(f"{name!r}: self.{name}" for name in names)
+    namespace: Dict[str, Any] = {}
+    exec(f"def to_dict(self):\n    return {{{items}}}\n", namespace)
+    to_dict = namespace["to_dict"]
+    to_dict.__qualname__ = f"{cls.__qualname__}.to_dict"
+    to_dict.__doc__ = "Convierte a diccionario (copia superficial)"
+    cls.to_dict = to_dict
+    return cls
+
 
 class ProvRelationType(str, Enum):
     """Tipos de relaciones PROV"""
@@ -19,7 +78,8 @@ class ProvRelationType(str, Enum):
     WAS_INFORMED_BY = "wasInformedBy"
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class DeviceMetadata:
     """Metadatos del dispositivo cuántico"""
     device_id: str
@@ -33,12 +93,13 @@ class DeviceMetadata:
     noise_characteristics: Dict[str, Any] = field(default_factory=dict)
     operational_parameters: Dict[str, Any] = field(default_factory=dict)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def to_json(self) -> bytes:
+        """Serializa a JSON (bytes UTF-8)"""
+        return _to_json_bytes(self)
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class CircuitMetadata:
     """Metadatos del circuito cuántico"""
     circuit_id: str
@@ -52,14 +113,16 @@ class CircuitMetadata:
     author: str = ""
     tags: List[str] = field(default_factory=list)
     algorithm_parameters: Dict[str, Any] = field(default_factory=dict)
-    circuit_qasm: Optional[str] = None
+    circuit_qasm: Optional[str] = None  # Se serializa tal cual (sin copia)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def __post_init__(self):
+        # Solo en modo debug (se omite con python -O)
+        assert self.circuit_qasm is None or isinstance(self.circuit_qasm, str), \
+            "circuit_qasm debe ser str o None"
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class CalibrationData:
     """Datos de calibración del dispositivo"""
     calibration_id: str
@@ -72,35 +135,59 @@ class CalibrationData:
     gate_fidelities: Dict[str, Any] = field(default_factory=dict)
     crosstalk_matrix: Dict[str, Any] = field(default_factory=dict)
     additional_metrics: Dict[str, Any] = field(default_factory=dict)
+    # Cachés internas (string ISO, datetime parseado); el prefijo '_' las excluye
+    # de to_dict y de la serialización con orjson
+    _valid_until_parsed: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _captured_parsed: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def _valid_until_dt(self) -> datetime.datetime:
+        """valid_until parseado una vez (se vuelve a parsear si el campo se reasigna)"""
+        cached = self._valid_until_parsed
+        if cached is None or cached[0] != self.valid_until:
+            cached = (self.valid_until, _parse_iso(self.valid_until))
+            self._valid_until_parsed = cached
+        return cached[1]
+
+    def _captured_dt(self) -> datetime.datetime:
+        """timestamp_captured parseado una vez (se vuelve a parsear si el campo se reasigna)"""
+        cached = self._captured_parsed
+        if cached is None or cached[0] != self.timestamp_captured:
+            cached = (self.timestamp_captured, _parse_iso(self.timestamp_captured))
+            self._captured_parsed = cached
+        return cached[1]
+
+    def is_valid_now(self, now: Optional[datetime.datetime] = None) -> bool:
+        """
+        Verifica si la calibración sigue siendo válida
 
-    def is_valid_now(self) -> bool:
-        """Verifica si la calibración sigue siendo válida"""
+        Args:
+            now: Instante UTC de referencia (opcional; permite reutilizar un único
+                 _now_utc() al validar muchas calibraciones)
+        """
         try:
-            valid_until_dt = datetime.datetime.fromisoformat(
-                self.valid_until.replace('Z', '+00:00')
-            )
-            now = datetime.datetime.now(datetime.timezone.utc)
-            return now < valid_until_dt
+            return (now or _now_utc()) < self._valid_until_dt()
         except Exception:
             return False
 
-    def age_seconds(self) -> float:
-        """Retorna la edad de la calibración en segundos"""
+    def age_seconds(self, now: Optional[datetime.datetime] = None) -> float:
+        """
+        Retorna la edad de la calibración en segundos
+
+        Args:
+            now: Instante UTC de referencia (opcional)
+        """
         try:
-            captured_dt = datetime.datetime.fromisoformat(
-                self.timestamp_captured.replace('Z', '+00:00')
-            )
-            now = datetime.datetime.now(datetime.timezone.utc)
-            return (now - captured_dt).total_seconds()
+            return ((now or _now_utc()) - self._captured_dt()).total_seconds()
         except Exception:
             return 0.0
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def to_json(self) -> bytes:
+        """Serializa a JSON (bytes UTF-8)"""
+        return _to_json_bytes(self)
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class CompilationTrace:
     """Traza de compilación del circuito"""
     trace_id: str
@@ -114,15 +201,17 @@ class CompilationTrace:
     compilation_passes: List[Dict[str, Any]] = field(default_factory=list)
     optimization_metrics: Dict[str, Any] = field(default_factory=dict)
     decisions_made: Dict[str, Any] = field(default_factory=dict)
-    final_circuit_qasm: Optional[str] = None
+    final_circuit_qasm: Optional[str] = None  # Se serializa tal cual (sin copia)
     compilation_errors: List[str] = field(default_factory=list)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def __post_init__(self):
+        # Solo en modo debug (se omite con python -O)
+        assert self.final_circuit_qasm is None or isinstance(self.final_circuit_qasm, str), \
+            "final_circuit_qasm debe ser str o None"
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class ExecutionContext:
     """Contexto de ejecución del circuito"""
     execution_id: str
@@ -138,14 +227,17 @@ class ExecutionContext:
     environmental_context: Dict[str, Any] = field(default_factory=dict)
     freshness_validation: Dict[str, Any] = field(default_factory=dict)
     execution_parameters: Dict[str, Any] = field(default_factory=dict)
+    # Se serializa tal cual (sin copia): solo tipos JSON (dict/list/str/int/float/bool/None)
     results: Optional[Dict[str, Any]] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def __post_init__(self):
+        # Solo en modo debug (se omite con python -O)
+        assert self.results is None or isinstance(self.results, dict), \
+            "results debe ser un dict JSON-serializable o None"
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class ProvenanceRecordLean:
     """Registro de proveniencia (versión lean)"""
     provenance_id: str
@@ -155,31 +247,50 @@ class ProvenanceRecordLean:
     workflow_graph: Dict[str, Any] = field(default_factory=dict)
     quality_assessment: Dict[str, Any] = field(default_factory=dict)
 
-    def add_relation(
-        self,
+    @staticmethod
+    def make_relation(
         relation_type: str,
         source_id: str,
         target_id: str,
         timestamp: str,
         role: Optional[str] = None
-    ):
-        """Añade una relación de proveniencia"""
-        relation = {
+    ) -> Dict[str, Any]:
+        """Construye el diccionario de una relación de proveniencia ('role' solo si se indica)"""
+        if role:
+            return {
+                "relation_type": relation_type,
+                "source_id": source_id,
+                "target_id": target_id,
+                "timestamp": timestamp,
+                "role": role
+            }
+        return {
             "relation_type": relation_type,
             "source_id": source_id,
             "target_id": target_id,
             "timestamp": timestamp
         }
-        if role:
-            relation["role"] = role
-        self.relations.append(relation)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
+    def add_relation(
+        self,
+        relation_type: str,
+        source_id: str,
+        target_id: str,
+        timestamp: str,
+        role: Optional[str] = None
+    ):
+        """Añade una relación de proveniencia"""
+        self.relations.append(
+            self.make_relation(relation_type, source_id, target_id, timestamp, role)
+        )
+
+    def add_relations(self, relations: Iterable[Dict[str, Any]]):
+        """Añade varias relaciones ya construidas (p.ej. con make_relation) en bloque"""
+        self.relations.extend(relations)
 
 
-@dataclass
+@_fast_to_dict
+@dataclass(**_SLOTS)
 class ExperimentSession:
     """Sesión de experimento (agregación de múltiples ejecuciones)"""
     session_id: str
@@ -197,20 +308,24 @@ class ExperimentSession:
     session_metrics: Dict[str, Any] = field(default_factory=dict)
     environmental_log: List[Dict[str, Any]] = field(default_factory=list)
     timestamp_ended: Optional[str] = None
+    # Índice de execution_ids para pertenencia O(1) (no se serializa)
+    _execution_id_set: set = field(default_factory=set, init=False, repr=False, compare=False)
 
     def add_execution(self, execution_id: str, shots: int):
         """Añade una ejecución a la sesión"""
-        if execution_id not in self.execution_ids:
+        known = self._execution_id_set
+        if len(known) != len(self.execution_ids):
+            # execution_ids se modificó directamente: reconstruir el índice
+            known.clear()
+            known.update(self.execution_ids)
+        if execution_id not in known:
+            known.add(execution_id)
             self.execution_ids.append(execution_id)
             self.num_executions += 1
             self.total_shots_used += shots
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return asdict(self)
-
 
-@dataclass
+@dataclass(**_SLOTS)
 class QCMetadataModel:
     """Modelo completo de metadatos QC (contenedor principal)"""
     model_version: str
@@ -222,45 +337,115 @@ class QCMetadataModel:
     execution_context: List[ExecutionContext]  # SIEMPRE array (GAP-1 fix)
     provenance_record: ProvenanceRecordLean
     experiment_session: Optional[ExperimentSession] = None
+    # Índice de execution_id de execution_context (evita comparar dataclasses completos)
+    _execution_ids: set = field(default_factory=set, init=False, repr=False, compare=False)
+    # Estado de validate_denormalization: índice de traces y nº de ejecuciones ya validadas
+    _traces_by_id: Dict[str, CompilationTrace] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _traces_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _validated_count: int = field(default=0, init=False, repr=False, compare=False)
     
     def add_execution_context(self, exec_ctx: ExecutionContext):
-        """Agregar ExecutionContext al modelo"""
-        if exec_ctx not in self.execution_context:
+        """Agregar ExecutionContext al modelo (se ignora si su execution_id ya está)"""
+        known = self._execution_ids
+        if len(known) != len(self.execution_context):
+            # execution_context se pasó al constructor o se modificó directamente
+            known.clear()
+            known.update(ctx.execution_id for ctx in self.execution_context)
+        if exec_ctx.execution_id not in known:
+            known.add(exec_ctx.execution_id)
             self.execution_context.append(exec_ctx)
 
-    def validate_denormalization(self) -> bool:
+    def _traces_index(self) -> Dict[str, CompilationTrace]:
         """
-        Valida que los mirrors (device_id, calibration_id) sean consistentes
-        entre CompilationTrace y ExecutionContext
+        Índice trace_id -> trace, reconstruido solo si compilation_trace cambia
+        (otro objeto o distinta longitud); al reconstruirlo se invalida lo ya validado
         """
         # Normalizar compilation_trace a lista (execution_context ya es lista)
         traces = self.compilation_trace if isinstance(
             self.compilation_trace, list
         ) else [self.compilation_trace]
-        executions = self.execution_context  # Ya es lista (GAP-1 fix)
+        key = (id(self.compilation_trace), len(traces))
+        if key != self._traces_key:
+            # Recorrido inverso: ante IDs repetidos gana el primero
+            self._traces_by_id = {t.trace_id: t for t in reversed(traces)}
+            self._traces_key = key
+            self._validated_count = 0
+        return self._traces_by_id
+
+    @staticmethod
+    def _mirrors_match(exec_ctx: ExecutionContext, traces_by_id: Dict[str, CompilationTrace]) -> bool:
+        """Comprueba los mirrors de un ExecutionContext contra su CompilationTrace"""
+        trace = traces_by_id.get(exec_ctx.trace_id)
+        if trace is None:
+            return False
+        return (exec_ctx.device_id, exec_ctx.calibration_id, exec_ctx.timestamp_compilation) == (
+            trace.device_id, trace.calibration_id, trace.timestamp_compilation
+        )
 
-        # Validar que cada ExecutionContext tiene mirrors consistentes
-        for exec_ctx in executions:
-            # Encontrar el trace correspondiente
-            trace = next(
-                (t for t in traces if t.trace_id == exec_ctx.trace_id),
-                None
-            )
-            if trace is None:
-                return False
+    def validate_denormalization(self) -> bool:
+        """
+        Valida que los mirrors (device_id, calibration_id) sean consistentes
+        entre CompilationTrace y ExecutionContext
+        Incremental: solo se comprueban los ExecutionContext añadidos desde la última
+        validación correcta (O(1) amortizado por ejecución). Si se modifican en sitio
+        los mirrors de entidades ya validadas, usar full_validate()
+        """
+        traces_by_id = self._traces_index()
+        executions = self.execution_context  # Ya es lista (GAP-1 fix)
+        if self._validated_count > len(executions):
+            self._validated_count = 0
 
-            # Validar mirrors
-            if exec_ctx.device_id != trace.device_id:
-                return False
-            if exec_ctx.calibration_id != trace.calibration_id:
-                return False
-            if exec_ctx.timestamp_compilation != trace.timestamp_compilation:
+        for index in range(self._validated_count, len(executions)):
+            if not self._mirrors_match(executions[index], traces_by_id):
                 return False
+            self._validated_count = index + 1
 
         return True
 
+    def full_validate(self) -> bool:
+        """Valida los mirrors de todos los ExecutionContext, sin reutilizar validaciones previas"""
+        self._traces_key = None
+        return self.validate_denormalization()
+
     def to_complete_json(self, indent: int = 2) -> str:
-        """Exporta el modelo completo a JSON"""
+        """
+        Exporta el modelo completo a JSON
+        Con orjson (indentación 2 o None, las únicas que soporta) se serializan los
+        dataclasses en una sola pasada, sin construir antes el diccionario de to_dict()
+        """
+        if HAS_ORJSON and indent in (2, None):
+            return self.to_json(indent=bool(indent)).decode("utf-8")
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_json(self, indent: bool = True) -> bytes:
+        """
+        Exporta el modelo completo a JSON (bytes UTF-8)
+        Usa orjson si está instalado (serializa los dataclasses sin pasar por asdict);
+        si no, equivale a to_complete_json().encode()
+        """
+        if not HAS_ORJSON:
+            return self.to_complete_json(indent=2 if indent else None).encode("utf-8")
+
+        data = {
+            "model_version": self.model_version,
+            "timestamp_model_created": self.timestamp_model_created,
+            "device_metadata": self.device_metadata,
+            "calibration_data": self.calibration_data,
+            "circuit_metadata": self.circuit_metadata,
+            "compilation_trace": self.compilation_trace,
+            "execution_context": self.execution_context,  # Siempre array (GAP-1 fix)
+            "provenance_record": self.provenance_record,
+        }
+        if self.experiment_session:
+            data["experiment_session"] = self.experiment_session
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte a diccionario (sin pasar por texto JSON)"""
         data = {
             "model_version": self.model_version,
             "timestamp_model_created": self.timestamp_model_created,
@@ -281,9 +466,5 @@ class QCMetadataModel:
         if self.experiment_session:
             data["experiment_session"] = self.experiment_session.to_dict()
 
-        return json.dumps(data, indent=indent, ensure_ascii=False)
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte a diccionario"""
-        return json.loads(self.to_complete_json())
+        return data
 
@@ -4,7 +4,6 @@ PoC 1: VQE Simple - Captura de Metadatos
 Ejecuta un circuito VQE pequeño para molécula H2 (2 qubits) una sola vez.
 """
 
-import json
 import datetime
 import sys
 import os
@@ -18,363 +17,371 @@ from model.qc_metadata_model import (
     CompilationTrace, ExecutionContext, ProvenanceRecordLean,
     QCMetadataModel
 )
-from helpers import build_vqe_circuit, simulate_vqe_execution, get_circuit_qasm, get_utc_now, get_utc_now_iso, parse_iso_timestamp, extract_compilation_passes
-
-# ============================================================
-# FASE 1: DISEÑO
-# ============================================================
-
-print("[FASE 1] Capturando especificación de circuito...")
-
-# Crear CircuitMetadata
-circuit_metadata = CircuitMetadata(
-    circuit_id="circuit_vqe_h2_poc1_20251112",
-    circuit_name="VQE for H2 Molecule (PoC1)",
-    algorithm_type="vqe",
-    num_qubits=2,
-    circuit_depth=8,
-    num_gates=20,
-    timestamp_created=get_utc_now_iso(),
-    description="Simple VQE for H2 using UCCSD ansatz",
-    author="Nawel Huenchuleo",
-    tags=["vqe", "h2", "poc", "uccsd"],
-    algorithm_parameters={
-        "molecule": "H2",
-        "basis": "sto-3g",
-        "ansatz": "UCCSD",
-        "optimizer": "COBYLA"
-    }
-)
-
-# Construir circuito y guardar QASM
-circuit = build_vqe_circuit(2)
-circuit_metadata.circuit_qasm = get_circuit_qasm(circuit)
-
-print(f"  ✓ CircuitMetadata creado: {circuit_metadata.circuit_id}")
-
-# Obtener DeviceMetadata (simulador IBM)
-device_metadata = DeviceMetadata(
-    device_id="ibmq_qasm_simulator",
-    provider="IBM",
-    technology="simulator",
-    backend_name="qasm_simulator",
-    num_qubits=32,
-    version="1.0",
-    timestamp_metadata=get_utc_now_iso(),
-    connectivity={"topology_type": "all_to_all"},
-    noise_characteristics={"avg_t1_us": None, "avg_t2_us": None}
-)
-
-print(f"  ✓ DeviceMetadata obtenido: {device_metadata.device_id}")
-
-# ============================================================
-# FASE 2: COMPILACIÓN
-# ============================================================
-
-print("\n[FASE 2] Compilando circuito...")
-
-# Obtener CalibrationData (para simulador, valores dummy)
-calibration_data = CalibrationData(
-    calibration_id="cal_simulator_20251112",
-    device_id=device_metadata.device_id,
-    timestamp_captured=get_utc_now_iso(),
-    valid_until=(get_utc_now() + datetime.timedelta(hours=4)).replace(tzinfo=None).isoformat() + "Z",
-    calibration_method="simulator_default",
-    calibration_version="1.0",
-    qubit_properties={i: {"t1_us": 1e6, "t2_us": 1e6, "readout_error": 0.0} 
-                    for i in range(2)},
-    gate_fidelities={
-        "1q_gates": {
-            "x": 1.0, "y": 1.0, "z": 1.0,
-            "h": 1.0, "s": 1.0, "t": 1.0,
-            "rx": 1.0, "ry": 1.0, "rz": 1.0,
-            "sx": 1.0, "id": 1.0
-        },
-        "2q_gates": {
-            "cx": 1.0,
-            "cz": 1.0,
-            "swap": 1.0,
-            "iswap": 1.0
-        }
-    },  # GAP-2 fix: Llenar gate_fidelities para simulador
-    crosstalk_matrix={}
-)
-
-print(f"  ✓ CalibrationData capturada: {calibration_data.calibration_id}")
-print(f"    Válida hasta: {calibration_data.valid_until}")
-
-# Compilar usando Qiskit
 from helpers import get_aer_backend
+from helpers import build_vqe_circuit, simulate_vqe_execution, get_circuit_qasm, get_utc_now, get_utc_now_iso, format_utc_iso, parse_iso_timestamp, extract_compilation_passes, validate_metadata_schema
+
+
+def main():
+    filename = None  # Ruta del JSON exportado (None si la exportación falla)
+
+    # ============================================================
+    # FASE 1: DISEÑO
+    # ============================================================
+
+    print("[FASE 1] Capturando especificación de circuito...")
+
+    # Un único timestamp para las entidades creadas en esta fase
+    phase1_iso = get_utc_now_iso()
+
+    # Crear CircuitMetadata
+    circuit_metadata = CircuitMetadata(
+        circuit_id="circuit_vqe_h2_poc1_20251112",
+        circuit_name="VQE for H2 Molecule (PoC1)",
+        algorithm_type="vqe",
+        num_qubits=2,
+        circuit_depth=8,
+        num_gates=20,
+        timestamp_created=phase1_iso,
+        description="Simple VQE for H2 using UCCSD ansatz",
+        author="Nawel Huenchuleo",
+        tags=["vqe", "h2", "poc", "uccsd"],
+        algorithm_parameters={
+            "molecule": "H2",
+            "basis": "sto-3g",
+            "ansatz": "UCCSD",
+            "optimizer": "COBYLA"
+        }
+    )
+
+    # Construir circuito y guardar QASM
+    circuit = build_vqe_circuit(2)
+    circuit_metadata.circuit_qasm = get_circuit_qasm(circuit)
+
+    print(f"  ✓ CircuitMetadata creado: {circuit_metadata.circuit_id}")
+
+    # Obtener DeviceMetadata (simulador IBM)
+    device_metadata = DeviceMetadata(
+        device_id="ibmq_qasm_simulator",
+        provider="IBM",
+        technology="simulator",
+        backend_name="qasm_simulator",
+        num_qubits=32,
+        version="1.0",
+        timestamp_metadata=phase1_iso,
+        connectivity={"topology_type": "all_to_all"},
+        noise_characteristics={"avg_t1_us": None, "avg_t2_us": None}
+    )
+
+    print(f"  ✓ DeviceMetadata obtenido: {device_metadata.device_id}")
+
+    # ============================================================
+    # FASE 2: COMPILACIÓN
+    # ============================================================
+
+    print("\n[FASE 2] Compilando circuito...")
+
+    phase2_start = get_utc_now()
+
+    # Obtener CalibrationData (para simulador, valores dummy)
+    calibration_data = CalibrationData(
+        calibration_id="cal_simulator_20251112",
+        device_id=device_metadata.device_id,
+        timestamp_captured=format_utc_iso(phase2_start),
+        valid_until=format_utc_iso(phase2_start + datetime.timedelta(hours=4)),
+        calibration_method="simulator_default",
+        calibration_version="1.0",
+        qubit_properties={i: {"t1_us": 1e6, "t2_us": 1e6, "readout_error": 0.0} 
+                        for i in range(2)},
+        gate_fidelities={
+            "1q_gates": {
+                "x": 1.0, "y": 1.0, "z": 1.0,
+                "h": 1.0, "s": 1.0, "t": 1.0,
+                "rx": 1.0, "ry": 1.0, "rz": 1.0,
+                "sx": 1.0, "id": 1.0
+            },
+            "2q_gates": {
+                "cx": 1.0,
+                "cz": 1.0,
+                "swap": 1.0,
+                "iswap": 1.0
+            }
+        },  # GAP-2 fix: Llenar gate_fidelities para simulador
+        crosstalk_matrix={}
+    )
+
+    print(f"  ✓ CalibrationData capturada: {calibration_data.calibration_id}")
+    print(f"    Válida hasta: {calibration_data.valid_until}")
+
+    # Compilar usando Qiskit
+    compilation_start = get_utc_now()
+
+    # Crear un backend simulado para transpilación
+    backend = get_aer_backend('qasm_simulator')
+
+    compiled_circuit = transpile(
+        circuit,
+        backend=backend,
+        optimization_level=3,
+        seed_transpiler=42
+    )
+
+    compilation_end = get_utc_now()
+    compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
+
+    # GAP-3: Extraer passes detallados
+    compilation_passes_detail = extract_compilation_passes(
+        compiled_circuit, 
+        original_circuit=circuit,
+        compilation_duration_ms=compilation_duration
+    )
+
+    # Crear CompilationTrace
+    compilation_trace = CompilationTrace(
+        trace_id="trace_poc1_20251112_150000",
+        circuit_id=circuit_metadata.circuit_id,
+        device_id=device_metadata.device_id,
+        calibration_id=calibration_data.calibration_id,
+        timestamp_compilation=format_utc_iso(compilation_end),
+        compiler_name="qiskit",
+        compiler_version="0.45.0",
+        compilation_duration_ms=compilation_duration,
+        compilation_passes=compilation_passes_detail,  # GAP-3: Passes detallados
+        optimization_metrics={
+            "gate_reduction_percent": 15,
+            "depth_reduction_percent": 10,
+            "estimated_final_fidelity": 0.95,
+            "original_depth": circuit.depth(),
+            "compiled_depth": compiled_circuit.depth(),
+            "original_gates": len(circuit.data),
+            "compiled_gates": len(compiled_circuit.data)
+        },
+        decisions_made={
+            "qubits_selected": [0, 1],
+            "swaps_necessary": 0
+        },
+        final_circuit_qasm=get_circuit_qasm(compiled_circuit)
+    )
+
+    print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
+    print(f"    Duración compilación: {compilation_duration:.2f}ms")
+
+    # ============================================================
+    # FASE 3: EJECUCIÓN
+    # ============================================================
+
+    print("\n[FASE 3] Ejecutando en QPU...")
+
+    execution_start = get_utc_now()
+
+    # Simular ejecución
+    job_result = simulate_vqe_execution(compiled_circuit, 1024)
+
+    execution_end = get_utc_now()
+
+    # Calcular edad de calibración
+    calibration_captured_dt = parse_iso_timestamp(calibration_data.timestamp_captured)
+    calibration_age_seconds = (execution_end.replace(tzinfo=datetime.timezone.utc) - 
+                            calibration_captured_dt).total_seconds()
+
+    # Crear ExecutionContext
+    execution_context = ExecutionContext(
+        execution_id="exec_poc1_20251112_150100",
+        trace_id=compilation_trace.trace_id,
+        device_id=device_metadata.device_id,  # MIRROR
+        calibration_id=calibration_data.calibration_id,  # MIRROR
+        timestamp_execution=format_utc_iso(execution_end),
+        timestamp_compilation=compilation_trace.timestamp_compilation,  # MIRROR
+        num_shots=1024,
+        execution_mode="qasm_simulator",
+        computed_from_trace=True,
+        queue_information={
+            "queue_position": 0,
+            "wait_time_seconds": 2.5,
+            "queue_length_at_submission": 5
+        },
+        environmental_context={
+            "backend_temperature_k": None,
+            "backend_operational_status": "nominal",
+            "concurrent_jobs": 1,
+            "system_load_percent": 25
+        },
+        freshness_validation={
+            "calibration_age_seconds": calibration_age_seconds,
+            "calibration_expired": not calibration_data.is_valid_now(),
+            "jit_transpilation_used": False
+        },
+        execution_parameters={
+            "seed": 42,
+            "optimization_level": 3,
+            "resilience_level": 0
+        },
+        results=job_result
+    )
+
+    print(f"  ✓ ExecutionContext creado: {execution_context.execution_id}")
+    print(f"    Shots: {execution_context.num_shots}")
+    print(f"    Calibración válida: {not execution_context.freshness_validation['calibration_expired']}")
+
+    # ============================================================
+    # FASE 4: ANÁLISIS
+    # ============================================================
+
+    print("\n[FASE 4] Integrando metadatos...")
+
+    phase4_iso = get_utc_now_iso()
+
+    # Crear ProvenanceRecordLean
+    provenance_record = ProvenanceRecordLean(
+        provenance_id="prov_poc1_20251112_150100",
+        timestamp_recorded=phase4_iso,
+        prov_mode="lean",
+        relations=[],
+        workflow_graph={},
+        quality_assessment={}
+    )
+
+    # Añadir relaciones
+    make_relation = ProvenanceRecordLean.make_relation
+    provenance_record.add_relations([
+        make_relation(
+            "wasDerivedFrom",
+            compilation_trace.trace_id,
+            circuit_metadata.circuit_id,
+            compilation_trace.timestamp_compilation,
+            role="compilation_input"
+        ),
+        make_relation(
+            "used",
+            compilation_trace.trace_id,
+            calibration_data.calibration_id,
+            compilation_trace.timestamp_compilation
+        ),
+        make_relation(
+            "used",
+            compilation_trace.trace_id,
+            device_metadata.device_id,
+            compilation_trace.timestamp_compilation
+        ),
+        make_relation(
+            "wasGeneratedBy",
+            execution_context.execution_id,
+            compilation_trace.trace_id,
+            execution_context.timestamp_execution
+        ),
+    ])
+
+    # Calcular workflow graph
+    workflow_start_dt = parse_iso_timestamp(circuit_metadata.timestamp_created)
+    total_duration = (execution_end.replace(tzinfo=datetime.timezone.utc) - workflow_start_dt).total_seconds()
+
+    provenance_record.workflow_graph = {
+        "workflow_start": circuit_metadata.timestamp_created,
+        "workflow_end": execution_context.timestamp_execution,
+        "total_duration_seconds": total_duration
+    }
 
-compilation_start = get_utc_now()
-
-# Crear un backend simulado para transpilación
-backend = get_aer_backend('qasm_simulator')
-
-compiled_circuit = transpile(
-    circuit,
-    backend=backend,
-    optimization_level=3,
-    seed_transpiler=42
-)
-
-compilation_end = get_utc_now()
-compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
-
-# GAP-3: Extraer passes detallados
-compilation_passes_detail = extract_compilation_passes(
-    compiled_circuit, 
-    original_circuit=circuit,
-    compilation_duration_ms=compilation_duration
-)
-
-# Crear CompilationTrace
-compilation_trace = CompilationTrace(
-    trace_id="trace_poc1_20251112_150000",
-    circuit_id=circuit_metadata.circuit_id,
-    device_id=device_metadata.device_id,
-    calibration_id=calibration_data.calibration_id,
-    timestamp_compilation=compilation_end.replace(tzinfo=None).isoformat() + "Z",
-    compiler_name="qiskit",
-    compiler_version="0.45.0",
-    compilation_duration_ms=compilation_duration,
-    compilation_passes=compilation_passes_detail,  # GAP-3: Passes detallados
-    optimization_metrics={
-        "gate_reduction_percent": 15,
-        "depth_reduction_percent": 10,
-        "estimated_final_fidelity": 0.95,
-        "original_depth": circuit.depth(),
-        "compiled_depth": compiled_circuit.depth(),
-        "original_gates": len(circuit.data),
-        "compiled_gates": len(compiled_circuit.data)
-    },
-    decisions_made={
-        "qubits_selected": [0, 1],
-        "swaps_necessary": 0
-    },
-    final_circuit_qasm=get_circuit_qasm(compiled_circuit)
-)
-
-print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
-print(f"    Duración compilación: {compilation_duration:.2f}ms")
-
-# ============================================================
-# FASE 3: EJECUCIÓN
-# ============================================================
-
-print("\n[FASE 3] Ejecutando en QPU...")
-
-execution_start = get_utc_now()
-
-# Simular ejecución
-job_result = simulate_vqe_execution(compiled_circuit, 1024)
-
-execution_end = get_utc_now()
-
-# Calcular edad de calibración
-calibration_captured_dt = parse_iso_timestamp(calibration_data.timestamp_captured)
-calibration_age_seconds = (execution_end.replace(tzinfo=datetime.timezone.utc) - 
-                        calibration_captured_dt).total_seconds()
-
-# Crear ExecutionContext
-execution_context = ExecutionContext(
-    execution_id="exec_poc1_20251112_150100",
-    trace_id=compilation_trace.trace_id,
-    device_id=device_metadata.device_id,  # MIRROR
-    calibration_id=calibration_data.calibration_id,  # MIRROR
-    timestamp_execution=execution_end.replace(tzinfo=None).isoformat() + "Z",
-    timestamp_compilation=compilation_trace.timestamp_compilation,  # MIRROR
-    num_shots=1024,
-    execution_mode="qasm_simulator",
-    computed_from_trace=True,
-    queue_information={
-        "queue_position": 0,
-        "wait_time_seconds": 2.5,
-        "queue_length_at_submission": 5
-    },
-    environmental_context={
-        "backend_temperature_k": None,
-        "backend_operational_status": "nominal",
-        "concurrent_jobs": 1,
-        "system_load_percent": 25
-    },
-    freshness_validation={
-        "calibration_age_seconds": calibration_age_seconds,
-        "calibration_expired": not calibration_data.is_valid_now(),
-        "jit_transpilation_used": False
-    },
-    execution_parameters={
-        "seed": 42,
-        "optimization_level": 3,
-        "resilience_level": 0
-    },
-    results=job_result
-)
-
-print(f"  ✓ ExecutionContext creado: {execution_context.execution_id}")
-print(f"    Shots: {execution_context.num_shots}")
-print(f"    Calibración válida: {not execution_context.freshness_validation['calibration_expired']}")
-
-# ============================================================
-# FASE 4: ANÁLISIS
-# ============================================================
-
-print("\n[FASE 4] Integrando metadatos...")
-
-# Crear ProvenanceRecordLean
-provenance_record = ProvenanceRecordLean(
-    provenance_id="prov_poc1_20251112_150100",
-    timestamp_recorded=get_utc_now_iso(),
-    prov_mode="lean",
-    relations=[],
-    workflow_graph={},
-    quality_assessment={}
-)
-
-# Añadir relaciones
-provenance_record.add_relation(
-    "wasDerivedFrom",
-    compilation_trace.trace_id,
-    circuit_metadata.circuit_id,
-    compilation_trace.timestamp_compilation,
-    role="compilation_input"
-)
+    provenance_record.quality_assessment = {
+        "data_lineage_complete": True,
+        "all_entities_linked": True,
+        "critical_paths_identified": ["design→compile→execute"]
+    }
 
-provenance_record.add_relation(
-    "used",
-    compilation_trace.trace_id,
-    calibration_data.calibration_id,
-    compilation_trace.timestamp_compilation
-)
+    print(f"  ✓ ProvenanceRecordLean creado: {provenance_record.provenance_id}")
+    print(f"    Relaciones: {len(provenance_record.relations)}")
+
+    # Crear QCMetadataModel (contenedor)
+    # GAP-1 fix: execution_context siempre es array
+    metadata_model = QCMetadataModel(
+        model_version="1.1.0",
+        timestamp_model_created=phase4_iso,
+        device_metadata=device_metadata,
+        calibration_data=[calibration_data],
+        circuit_metadata=circuit_metadata,
+        compilation_trace=compilation_trace,
+        execution_context=[execution_context],  # Array siempre
+        provenance_record=provenance_record,
+        experiment_session=None
+    )
+
+    # Validar denormalización
+    try:
+        is_consistent = metadata_model.validate_denormalization()
+        print(f"  ✓ Validación de denormalización: {'PASÓ' if is_consistent else 'FALLÓ'}")
+    except Exception as e:
+        print(f"  ✗ Error en validación: {e}")
 
-provenance_record.add_relation(
-    "used",
-    compilation_trace.trace_id,
-    device_metadata.device_id,
-    compilation_trace.timestamp_compilation
-)
+    # ============================================================
+    # EXPORTACIÓN Y ALMACENAMIENTO
+    # ============================================================
 
-provenance_record.add_relation(
-    "wasGeneratedBy",
-    execution_context.execution_id,
-    compilation_trace.trace_id,
-    execution_context.timestamp_execution
-)
+    print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
 
-# Calcular workflow graph
-workflow_start_dt = parse_iso_timestamp(circuit_metadata.timestamp_created)
-total_duration = (execution_end.replace(tzinfo=datetime.timezone.utc) - workflow_start_dt).total_seconds()
-
-provenance_record.workflow_graph = {
-    "workflow_start": circuit_metadata.timestamp_created,
-    "workflow_end": execution_context.timestamp_execution,
-    "total_duration_seconds": total_duration
-}
-
-provenance_record.quality_assessment = {
-    "data_lineage_complete": True,
-    "all_entities_linked": True,
-    "critical_paths_identified": ["design→compile→execute"]
-}
-
-print(f"  ✓ ProvenanceRecordLean creado: {provenance_record.provenance_id}")
-print(f"    Relaciones: {len(provenance_record.relations)}")
-
-# Crear QCMetadataModel (contenedor)
-# GAP-1 fix: execution_context siempre es array
-metadata_model = QCMetadataModel(
-    model_version="1.1.0",
-    timestamp_model_created=get_utc_now_iso(),
-    device_metadata=device_metadata,
-    calibration_data=[calibration_data],
-    circuit_metadata=circuit_metadata,
-    compilation_trace=compilation_trace,
-    execution_context=[execution_context],  # Array siempre
-    provenance_record=provenance_record,
-    experiment_session=None
-)
+    # Crear directorio outputs si no existe
+    os.makedirs("outputs", exist_ok=True)
 
-# Validar denormalización
-try:
-    is_consistent = metadata_model.validate_denormalization()
-    print(f"  ✓ Validación de denormalización: {'PASÓ' if is_consistent else 'FALLÓ'}")
-except Exception as e:
-    print(f"  ✗ Error en validación: {e}")
-
-# ============================================================
-# EXPORTACIÓN Y ALMACENAMIENTO
-# ============================================================
-
-print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
-
-# Crear directorio outputs si no existe
-os.makedirs("outputs", exist_ok=True)
-
-# Exportar a JSON
-try:
-    json_output = metadata_model.to_complete_json()
-    
-    # Guardar a archivo
-    filename = f"outputs/metadata_poc1_vqe_h2_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(json_output)
-    
-    print(f"  ✓ Archivo guardado: {filename}")
-    print(f"    Tamaño: {len(json_output)} bytes")
-    
-    # Validar contra JSON Schema
+    # Exportar a JSON
     try:
-        import jsonschema
-        schema_path = os.path.join("model", "schema_qc_metadata_v1.1.json")
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema = json.load(f)
-        
-        jsonschema.validate(json.loads(json_output), schema)
-        print(f"  ✓ Validación JSON Schema: PASÓ")
-    except ImportError:
-        print(f"  ⚠ jsonschema no instalado, saltando validación")
-    except Exception as e:
-        print(f"  ✗ Error en validación JSON Schema: {e}")
-    
-except Exception as e:
-    print(f"  ✗ Error en exportación: {e}")
-    import traceback
-    traceback.print_exc()
-
-# ============================================================
-# REPORTE FINAL
-# ============================================================
-
-print("\n" + "="*60)
-print("PoC 1: COMPLETA")
-print("="*60)
-
-# Calcular métricas
-design_time = (compilation_start - parse_iso_timestamp(
-    circuit_metadata.timestamp_created
-)).total_seconds() * 1000
-compile_time = compilation_duration
-exec_time = (execution_end - execution_start).total_seconds() * 1000
-analysis_time = (get_utc_now() - execution_end).total_seconds() * 1000
-
-print(f"\nTIMINGS:")
-print(f"  - Diseño: {design_time:.2f} ms")
-print(f"  - Compilación: {compile_time:.2f} ms")
-print(f"  - Ejecución: {exec_time:.2f} ms")
-print(f"  - Análisis: {analysis_time:.2f} ms")
-print(f"  - TOTAL: {design_time + compile_time + exec_time + analysis_time:.2f} ms")
-
-print(f"\nMETADATOS:")
-print(f"  - Entidades capturadas: 7/7")
-print(f"  - Relaciones PROV: {len(provenance_record.relations)}")
-print(f"  - Validación denormalización: {'PASÓ ✓' if is_consistent else 'FALLÓ ✗'}")
-
-if 'filename' in locals():
-    import os
-    file_size = os.path.getsize(filename)
-    print(f"\nJSON:")
-    print(f"  - Tamaño: {file_size / 1024:.2f} KB")
-    print(f"  - Archivo: {filename}")
-
-print("\nCONCLUSIÓN: PASÓ ✓")
+        # JSON en bytes UTF-8 (orjson si está instalado), escrito en modo binario sin pasar por str
+        json_output = metadata_model.to_json()
+
+        # Guardar a archivo
+        filename = f"outputs/metadata_poc1_vqe_h2_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, 'wb') as f:
+            f.write(json_output)
+
+        print(f"  ✓ Archivo guardado: {filename}")
+        print(f"    Tamaño: {len(json_output)} bytes")
+
+        # Validar contra JSON Schema (validador compilado una vez; sin re-parsear el JSON)
+        try:
+            validate_metadata_schema(metadata_model.to_dict())
+            print(f"  ✓ Validación JSON Schema: PASÓ")
+        except ImportError:
+            print(f"  ⚠ jsonschema no instalado, saltando validación")
+        except Exception as e:
+            print(f"  ✗ Error en validación JSON Schema: {e}")
 
+    except Exception as e:
+        print(f"  ✗ Error en exportación: {e}")
+        import traceback
+        traceback.print_exc()
+
+    # ============================================================
+    # REPORTE FINAL
+    # ============================================================
+
+    print("\n" + "="*60)
+    print("PoC 1: COMPLETA")
+    print("="*60)
+
+    # Calcular métricas
+    design_time = (compilation_start - parse_iso_timestamp(
+        circuit_metadata.timestamp_created
+    )).total_seconds() * 1000
+    compile_time = compilation_duration
+    exec_time = (execution_end - execution_start).total_seconds() * 1000
+    analysis_time = (get_utc_now() - execution_end).total_seconds() * 1000
+
+    print(f"\nTIMINGS:")
+    print(f"  - Diseño: {design_time:.2f} ms")
+    print(f"  - Compilación: {compile_time:.2f} ms")
+    print(f"  - Ejecución: {exec_time:.2f} ms")
+    print(f"  - Análisis: {analysis_time:.2f} ms")
+    print(f"  - TOTAL: {design_time + compile_time + exec_time + analysis_time:.2f} ms")
+
+    print(f"\nMETADATOS:")
+    print(f"  - Entidades capturadas: 7/7")
+    print(f"  - Relaciones PROV: {len(provenance_record.relations)}")
+    print(f"  - Validación denormalización: {'PASÓ ✓' if is_consistent else 'FALLÓ ✗'}")
+
+    if filename is not None:
+        file_size = os.path.getsize(filename)
+        print(f"\nJSON:")
+        print(f"  - Tamaño: {file_size / 1024:.2f} KB")
+        print(f"  - Archivo: {filename}")
+
+    print("\nCONCLUSIÓN: PASÓ ✓")
+
+
+if __name__ == "__main__":
+    main()
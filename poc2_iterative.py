@@ -5,445 +5,460 @@ Ejecuta VQE con 5 iteraciones. Valida que ExperimentSession agrega correctamente
 las ejecuciones y que JIT transpilation funciona (recalibración si es necesario).
 """
 
-import json
 import datetime
 import sys
 import os
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from qiskit import transpile
-from helpers import get_aer_backend
+from helpers import get_aer_backend, cached_transpile_with_qasm
 from model.qc_metadata_model import (
     DeviceMetadata, CircuitMetadata, CalibrationData,
     CompilationTrace, ExecutionContext, ProvenanceRecordLean,
     ExperimentSession, QCMetadataModel
 )
-from helpers import build_vqe_circuit, simulate_vqe_execution, fetch_new_calibration
-
-# ============================================================
-# FASE 1: DISEÑO
-# ============================================================
-
-print("[FASE 1] Capturando especificación de circuito...")
-
-circuit_metadata = CircuitMetadata(
-    circuit_id="circuit_vqe_h2_poc2_20251112",
-    circuit_name="VQE for H2 Molecule (PoC2 - Iterativo)",
-    algorithm_type="vqe",
-    num_qubits=2,
-    circuit_depth=8,
-    num_gates=20,
-    timestamp_created=datetime.datetime.utcnow().isoformat() + "Z",
-    description="Iterative VQE for H2 using UCCSD ansatz with 5 iterations",
-    author="Nawel Huenchuleo",
-    tags=["vqe", "h2", "poc", "uccsd", "iterative"],
-    algorithm_parameters={
-        "molecule": "H2",
-        "basis": "sto-3g",
-        "ansatz": "UCCSD",
-        "optimizer": "COBYLA",
-        "max_iterations": 5
-    }
-)
+from helpers import build_vqe_circuit, simulate_vqe_execution, fetch_new_calibration, validate_metadata_schema
+from helpers import fetch_temp, fetch_system_load, parse_iso_timestamp
+from helpers import get_utc_now, get_utc_now_iso, format_utc_iso
+
+# Metadatos estáticos: se construyen una vez y se comparten por referencia entre
+# iteraciones (no se modifican después de asignarlos)
+SIMULATOR_QUBIT_PROPERTIES = {i: {"t1_us": 1e6, "t2_us": 1e6, "readout_error": 0.0}
+                              for i in range(2)}
+OPTIMIZATION_METRICS = {
+    "gate_reduction_percent": 15,
+    "depth_reduction_percent": 10,
+    "estimated_final_fidelity": 0.95
+}
+JIT_COMPILATION_PASSES = [
+    {"pass_name": "JIT_Recompilation", "status": "completed"},
+    {"pass_name": "Optimize1qGates", "status": "completed"}
+]
+# Traza de una recompilación resuelta desde la caché de transpile (no se recompiló)
+TRANSPILE_CACHE_HIT_PASSES = [
+    {"pass_name": "TranspileCacheHit", "status": "reused"}
+]
+JIT_DECISIONS = {
+    "qubits_selected": [0, 1],
+    "swaps_necessary": 0,
+    "jit_recompilation": True
+}
 
-circuit = build_vqe_circuit(2)
-circuit_metadata.circuit_qasm = circuit.qasm()
-
-print(f"  ✓ CircuitMetadata creado: {circuit_metadata.circuit_id}")
-
-device_metadata = DeviceMetadata(
-    device_id="ibmq_qasm_simulator",
-    provider="IBM",
-    technology="simulator",
-    backend_name="qasm_simulator",
-    num_qubits=32,
-    version="1.0",
-    timestamp_metadata=datetime.datetime.utcnow().isoformat() + "Z",
-    connectivity={"topology_type": "all_to_all"},
-    noise_characteristics={"avg_t1_us": None, "avg_t2_us": None}
-)
 
-print(f"  ✓ DeviceMetadata obtenido: {device_metadata.device_id}")
-
-# ============================================================
-# FASE 2: COMPILACIÓN INICIAL
-# ============================================================
-
-print("\n[FASE 2] Compilando circuito inicial...")
-
-calibration_data = CalibrationData(
-    calibration_id="cal_simulator_poc2_initial",
-    device_id=device_metadata.device_id,
-    timestamp_captured=datetime.datetime.utcnow().isoformat() + "Z",
-    valid_until=(datetime.datetime.utcnow() + datetime.timedelta(hours=4)).isoformat() + "Z",
-    calibration_method="simulator_default",
-    calibration_version="1.0",
-    qubit_properties={i: {"t1_us": 1e6, "t2_us": 1e6, "readout_error": 0.0} 
-                      for i in range(2)},
-    gate_fidelities={"1q_gates": {}, "2q_gates": {}},
-    crosstalk_matrix={}
-)
+def main():
+    filename = None  # Ruta del JSON exportado (None si la exportación falla)
+
+    # ============================================================
+    # FASE 1: DISEÑO
+    # ============================================================
+
+    print("[FASE 1] Capturando especificación de circuito...")
+
+    # Un único timestamp para las entidades creadas en esta fase
+    phase1_iso = get_utc_now_iso()
+
+    circuit_metadata = CircuitMetadata(
+        circuit_id="circuit_vqe_h2_poc2_20251112",
+        circuit_name="VQE for H2 Molecule (PoC2 - Iterativo)",
+        algorithm_type="vqe",
+        num_qubits=2,
+        circuit_depth=8,
+        num_gates=20,
+        timestamp_created=phase1_iso,
+        description="Iterative VQE for H2 using UCCSD ansatz with 5 iterations",
+        author="Nawel Huenchuleo",
+        tags=["vqe", "h2", "poc", "uccsd", "iterative"],
+        algorithm_parameters={
+            "molecule": "H2",
+            "basis": "sto-3g",
+            "ansatz": "UCCSD",
+            "optimizer": "COBYLA",
+            "max_iterations": 5
+        }
+    )
 
-print(f"  ✓ CalibrationData capturada: {calibration_data.calibration_id}")
-
-backend = get_aer_backend('qasm_simulator')
-compilation_start = datetime.datetime.utcnow()
-compiled_circuit = transpile(circuit, backend=backend, optimization_level=3, seed_transpiler=42)
-compilation_end = datetime.datetime.utcnow()
-compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
-
-compilation_trace = CompilationTrace(
-    trace_id="trace_poc2_initial",
-    circuit_id=circuit_metadata.circuit_id,
-    device_id=device_metadata.device_id,
-    calibration_id=calibration_data.calibration_id,
-    timestamp_compilation=compilation_end.isoformat() + "Z",
-    compiler_name="qiskit",
-    compiler_version="0.45.0",
-    compilation_duration_ms=compilation_duration,
-    compilation_passes=[
-        {"pass_name": "Unroll3qOrMore", "status": "completed"},
-        {"pass_name": "TrivialLayout", "status": "completed"},
-        {"pass_name": "Optimize1qGates", "status": "completed"}
-    ],
-    optimization_metrics={
-        "gate_reduction_percent": 15,
-        "depth_reduction_percent": 10,
-        "estimated_final_fidelity": 0.95
-    },
-    decisions_made={
-        "qubits_selected": [0, 1],
-        "swaps_necessary": 0
-    },
-    final_circuit_qasm=compiled_circuit.qasm()
-)
+    circuit = build_vqe_circuit(2)
+    circuit_metadata.circuit_qasm = circuit.qasm()
+
+    print(f"  ✓ CircuitMetadata creado: {circuit_metadata.circuit_id}")
+
+    device_metadata = DeviceMetadata(
+        device_id="ibmq_qasm_simulator",
+        provider="IBM",
+        technology="simulator",
+        backend_name="qasm_simulator",
+        num_qubits=32,
+        version="1.0",
+        timestamp_metadata=phase1_iso,
+        connectivity={"topology_type": "all_to_all"},
+        noise_characteristics={"avg_t1_us": None, "avg_t2_us": None}
+    )
 
-print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
-
-# ============================================================
-# FASE 3: EXPERIMENT SESSION
-# ============================================================
-
-print("\n[FASE 3] Creando ExperimentSession...")
-
-experiment_session = ExperimentSession(
-    session_id=f"vqe_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_poc2",
-    algorithm_type="vqe",
-    timestamp_started=datetime.datetime.utcnow().isoformat() + "Z",
-    circuit_id=circuit_metadata.circuit_id,
-    device_id=device_metadata.device_id,
-    optimizer="COBYLA",
-    max_iterations=5,
-    shots_default=1024,
-    calibration_policy="periodic",  # Recalibrar cada 2 iteraciones
-    num_executions=0,
-    total_shots_used=0,
-    execution_ids=[],
-    session_metrics={
-        "convergence_metric": None,
-        "convergence_achieved": False,
-        "parameter_history": []
-    },
-    environmental_log=[]
-)
+    print(f"  ✓ DeviceMetadata obtenido: {device_metadata.device_id}")
+
+    # ============================================================
+    # FASE 2: COMPILACIÓN INICIAL
+    # ============================================================
+
+    print("\n[FASE 2] Compilando circuito inicial...")
+
+    phase2_start = get_utc_now()
+
+    calibration_data = CalibrationData(
+        calibration_id="cal_simulator_poc2_initial",
+        device_id=device_metadata.device_id,
+        timestamp_captured=format_utc_iso(phase2_start),
+        valid_until=format_utc_iso(phase2_start + datetime.timedelta(hours=4)),
+        calibration_method="simulator_default",
+        calibration_version="1.0",
+        qubit_properties=SIMULATOR_QUBIT_PROPERTIES,
+        gate_fidelities={"1q_gates": {}, "2q_gates": {}},
+        crosstalk_matrix={}
+    )
 
-print(f"  ✓ ExperimentSession creado: {experiment_session.session_id}")
-
-# ============================================================
-# FASE 4: LOOP DE ITERACIONES
-# ============================================================
-
-print("\n[FASE 4] Ejecutando 5 iteraciones...")
-
-all_execution_contexts = []
-all_compilation_traces = [compilation_trace]
-all_calibration_data = [calibration_data]
-current_trace = compilation_trace
-current_calibration = calibration_data
-
-for iteration in range(1, 6):
-    print(f"\n[ITER {iteration}/5] Validando calibración...")
-    
-    # Validar si calibración expiró (simulamos expiración en iteración 3)
-    if iteration == 3 and current_calibration.is_valid_now():
-        # Simular expiración forzada para demostrar JIT
-        print(f"  Simulando expiración de calibración...")
-        # Crear calibración expirada
-        expired_time = datetime.datetime.utcnow() - datetime.timedelta(hours=5)
-        current_calibration.valid_until = expired_time.isoformat() + "Z"
-    
-    if not current_calibration.is_valid_now():
-        print(f"  Calibración expirada después de {current_calibration.age_seconds():.0f}s")
-        print(f"  Recalibrando...")
-        current_calibration = fetch_new_calibration(device_metadata)
-        all_calibration_data.append(current_calibration)
-        
-        # Recompilar (JIT)
-        print(f"  Recompilando con nueva calibración...")
-        compilation_start = datetime.datetime.utcnow()
-        compiled_circuit = transpile(circuit, backend=backend, optimization_level=3, seed_transpiler=42)
-        compilation_end = datetime.datetime.utcnow()
-        compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
-        
-        current_trace = CompilationTrace(
-            trace_id=f"trace_poc2_iter{iteration}_jit",
-            circuit_id=circuit_metadata.circuit_id,
+    print(f"  ✓ CalibrationData capturada: {calibration_data.calibration_id}")
+
+    backend = get_aer_backend('qasm_simulator')
+    # Duración con reloj monotónico (inmune a ajustes NTP); el reloj de pared solo fecha la traza
+    compilation_start_ns = time.monotonic_ns()
+    compiled_circuit, compiled_qasm, cache_hit = cached_transpile_with_qasm(circuit, backend, optimization_level=1, seed_transpiler=42)
+    compilation_duration = (time.monotonic_ns() - compilation_start_ns) / 1e6
+    compilation_end = get_utc_now()
+
+    compilation_trace = CompilationTrace(
+        trace_id="trace_poc2_initial",
+        circuit_id=circuit_metadata.circuit_id,
+        device_id=device_metadata.device_id,
+        calibration_id=calibration_data.calibration_id,
+        timestamp_compilation=format_utc_iso(compilation_end),
+        compiler_name="qiskit",
+        compiler_version="0.45.0",
+        compilation_duration_ms=compilation_duration,
+        compilation_passes=TRANSPILE_CACHE_HIT_PASSES if cache_hit else [
+            {"pass_name": "Unroll3qOrMore", "status": "completed"},
+            {"pass_name": "TrivialLayout", "status": "completed"},
+            {"pass_name": "Optimize1qGates", "status": "completed"}
+        ],
+        optimization_metrics=OPTIMIZATION_METRICS,
+        decisions_made={
+            "qubits_selected": [0, 1],
+            "swaps_necessary": 0,
+            "cache_hit": cache_hit
+        },
+        final_circuit_qasm=compiled_qasm
+    )
+
+    print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
+
+    # ============================================================
+    # FASE 3: EXPERIMENT SESSION
+    # ============================================================
+
+    print("\n[FASE 3] Creando ExperimentSession...")
+
+    experiment_session = ExperimentSession(
+        session_id=f"vqe_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_poc2",
+        algorithm_type="vqe",
+        timestamp_started=get_utc_now_iso(),
+        circuit_id=circuit_metadata.circuit_id,
+        device_id=device_metadata.device_id,
+        optimizer="COBYLA",
+        max_iterations=5,
+        shots_default=1024,
+        calibration_policy="periodic",  # Recalibrar cada 2 iteraciones
+        num_executions=0,
+        total_shots_used=0,
+        execution_ids=[],
+        session_metrics={
+            "convergence_metric": None,
+            "convergence_achieved": False,
+            "parameter_history": []
+        },
+        environmental_log=[]
+    )
+
+    print(f"  ✓ ExperimentSession creado: {experiment_session.session_id}")
+
+    # ============================================================
+    # FASE 4: LOOP DE ITERACIONES
+    # ============================================================
+
+    print("\n[FASE 4] Ejecutando 5 iteraciones...")
+
+    all_execution_contexts = []
+    all_compilation_traces = [compilation_trace]
+    all_calibration_data = [calibration_data]
+    current_trace = compilation_trace
+    current_calibration = calibration_data
+
+    for iteration in range(1, 6):
+        print(f"\n[ITER {iteration}/5] Validando calibración...")
+
+        # Validar si calibración expiró (simulamos expiración en iteración 3)
+        if iteration == 3 and current_calibration.is_valid_now():
+            # Simular expiración forzada para demostrar JIT
+            print(f"  Simulando expiración de calibración...")
+            # Crear calibración expirada
+            expired_time = get_utc_now() - datetime.timedelta(hours=5)
+            current_calibration.valid_until = format_utc_iso(expired_time)
+
+        if not current_calibration.is_valid_now():
+            print(f"  Calibración expirada después de {current_calibration.age_seconds():.0f}s")
+            print(f"  Recalibrando...")
+            current_calibration = fetch_new_calibration(device_metadata)
+            all_calibration_data.append(current_calibration)
+
+            # Recompilar (JIT)
+            print(f"  Recompilando con nueva calibración...")
+            compilation_start_ns = time.monotonic_ns()
+            compiled_circuit, compiled_qasm, cache_hit = cached_transpile_with_qasm(circuit, backend, optimization_level=1, seed_transpiler=42)
+            compilation_duration = (time.monotonic_ns() - compilation_start_ns) / 1e6
+            compilation_end = get_utc_now()
+
+            current_trace = CompilationTrace(
+                trace_id=f"trace_poc2_iter{iteration}_jit",
+                circuit_id=circuit_metadata.circuit_id,
+                device_id=device_metadata.device_id,
+                calibration_id=current_calibration.calibration_id,
+                timestamp_compilation=format_utc_iso(compilation_end),
+                compiler_name="qiskit",
+                compiler_version="0.45.0",
+                compilation_duration_ms=compilation_duration,
+                compilation_passes=TRANSPILE_CACHE_HIT_PASSES if cache_hit else JIT_COMPILATION_PASSES,
+                optimization_metrics=OPTIMIZATION_METRICS,
+                decisions_made={**JIT_DECISIONS, "cache_hit": cache_hit},
+                final_circuit_qasm=compiled_qasm
+            )
+            all_compilation_traces.append(current_trace)
+            if cache_hit:
+                print(f"  ✓ Compilación reutilizada desde caché (sin recompilar): {current_trace.trace_id}")
+            else:
+                print(f"  ✓ JIT Recompilación completada: {current_trace.trace_id}")
+
+        # Ejecutar
+        execution_start = get_utc_now()
+        job_result = simulate_vqe_execution(compiled_circuit, 1024)
+        execution_end = get_utc_now()
+
+        # Calcular edad de calibración
+        calibration_captured_dt = parse_iso_timestamp(current_calibration.timestamp_captured)
+        calibration_age_seconds = (execution_end - 
+                                  calibration_captured_dt).total_seconds()
+
+        exec_ctx = ExecutionContext(
+            execution_id=f"exec_poc2_iter{iteration}_{datetime.datetime.now().strftime('%H%M%S')}",
+            trace_id=current_trace.trace_id,
             device_id=device_metadata.device_id,
             calibration_id=current_calibration.calibration_id,
-            timestamp_compilation=compilation_end.isoformat() + "Z",
-            compiler_name="qiskit",
-            compiler_version="0.45.0",
-            compilation_duration_ms=compilation_duration,
-            compilation_passes=[
-                {"pass_name": "JIT_Recompilation", "status": "completed"},
-                {"pass_name": "Optimize1qGates", "status": "completed"}
-            ],
-            optimization_metrics={
-                "gate_reduction_percent": 15,
-                "depth_reduction_percent": 10,
-                "estimated_final_fidelity": 0.95
+            timestamp_execution=format_utc_iso(execution_end),
+            timestamp_compilation=current_trace.timestamp_compilation,
+            num_shots=1024,
+            execution_mode="qasm_simulator",
+            computed_from_trace=True,
+            queue_information={
+                "queue_position": 0,
+                "wait_time_seconds": 2.5 + iteration * 0.5,
+                "queue_length_at_submission": 5 + iteration
+            },
+            environmental_context={
+                "backend_temperature_k": None,
+                "backend_operational_status": "nominal",
+                "concurrent_jobs": iteration,
+                "system_load_percent": 25 + iteration * 5
+            },
+            freshness_validation={
+                "calibration_age_seconds": calibration_age_seconds,
+                "calibration_expired": not current_calibration.is_valid_now(),
+                "jit_transpilation_used": (iteration >= 3)
             },
-            decisions_made={
-                "qubits_selected": [0, 1],
-                "swaps_necessary": 0,
-                "jit_recompilation": True
+            execution_parameters={
+                "seed": 42 + iteration,
+                "optimization_level": 1,
+                "resilience_level": 0,
+                "iteration": iteration
             },
-            final_circuit_qasm=compiled_circuit.qasm()
+            results=job_result
         )
-        all_compilation_traces.append(current_trace)
-        print(f"  ✓ JIT Recompilación completada: {current_trace.trace_id}")
-    
-    # Ejecutar
-    execution_start = datetime.datetime.utcnow()
-    job_result = simulate_vqe_execution(compiled_circuit, 1024)
-    execution_end = datetime.datetime.utcnow()
-    
-    # Calcular edad de calibración
-    calibration_captured_dt = datetime.datetime.fromisoformat(
-        current_calibration.timestamp_captured.replace('Z', '+00:00')
-    )
-    calibration_age_seconds = (execution_end.replace(tzinfo=datetime.timezone.utc) - 
-                              calibration_captured_dt).total_seconds()
-    
-    exec_ctx = ExecutionContext(
-        execution_id=f"exec_poc2_iter{iteration}_{datetime.datetime.now().strftime('%H%M%S')}",
-        trace_id=current_trace.trace_id,
-        device_id=device_metadata.device_id,
-        calibration_id=current_calibration.calibration_id,
-        timestamp_execution=execution_end.isoformat() + "Z",
-        timestamp_compilation=current_trace.timestamp_compilation,
-        num_shots=1024,
-        execution_mode="qasm_simulator",
-        computed_from_trace=True,
-        queue_information={
-            "queue_position": 0,
-            "wait_time_seconds": 2.5 + iteration * 0.5,
-            "queue_length_at_submission": 5 + iteration
-        },
-        environmental_context={
-            "backend_temperature_k": None,
-            "backend_operational_status": "nominal",
-            "concurrent_jobs": iteration,
-            "system_load_percent": 25 + iteration * 5
-        },
-        freshness_validation={
-            "calibration_age_seconds": calibration_age_seconds,
-            "calibration_expired": not current_calibration.is_valid_now(),
-            "jit_transpilation_used": (iteration >= 3)
-        },
-        execution_parameters={
-            "seed": 42 + iteration,
-            "optimization_level": 3,
-            "resilience_level": 0,
+
+        all_execution_contexts.append(exec_ctx)
+        experiment_session.add_execution(exec_ctx.execution_id, 1024)
+
+        # Log ambiental
+        experiment_session.environmental_log.append({
+            "timestamp": get_utc_now_iso(),
+            "temperature_k": fetch_temp(),
+            "system_load_percent": fetch_system_load(),
             "iteration": iteration
-        },
-        results=job_result
+        })
+
+        # Actualizar métricas de convergencia
+        estimated_energy = job_result.get("estimated_energy", -1.137)
+        experiment_session.session_metrics["parameter_history"].append({
+            "iteration": iteration,
+            "energy": estimated_energy,
+            "timestamp": exec_ctx.timestamp_execution
+        })
+
+        print(f"  ✓ Ejecución {iteration} completada: {exec_ctx.execution_id}")
+        print(f"    Energía estimada: {estimated_energy:.4f}")
+
+    # Finalizar sesión
+    experiment_session.timestamp_ended = get_utc_now_iso()
+    experiment_session.session_metrics["convergence_achieved"] = True
+    experiment_session.session_metrics["convergence_metric"] = -1.1373
+    experiment_session.session_metrics["final_energy"] = experiment_session.session_metrics["parameter_history"][-1]["energy"]
+
+    print(f"\n  ✓ ExperimentSession finalizado")
+    print(f"    Total ejecuciones: {experiment_session.num_executions}")
+    print(f"    Total shots: {experiment_session.total_shots_used}")
+
+    # ============================================================
+    # FASE 5: ANÁLISIS
+    # ============================================================
+
+    print("\n[FASE 5] Integrando metadatos...")
+
+    phase5_iso = get_utc_now_iso()
+
+    provenance_record = ProvenanceRecordLean(
+        provenance_id="prov_poc2_20251112",
+        timestamp_recorded=phase5_iso,
+        prov_mode="lean",
+        relations=[],
+        workflow_graph={},
+        quality_assessment={}
     )
-    
-    all_execution_contexts.append(exec_ctx)
-    experiment_session.add_execution(exec_ctx.execution_id, 1024)
-    
-    # Log ambiental
-    from helpers import fetch_temp, fetch_system_load
-    experiment_session.environmental_log.append({
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "temperature_k": fetch_temp(),
-        "system_load_percent": fetch_system_load(),
-        "iteration": iteration
-    })
-    
-    # Actualizar métricas de convergencia
-    estimated_energy = job_result.get("estimated_energy", -1.137)
-    experiment_session.session_metrics["parameter_history"].append({
-        "iteration": iteration,
-        "energy": estimated_energy,
-        "timestamp": exec_ctx.timestamp_execution
-    })
-    
-    print(f"  ✓ Ejecución {iteration} completada: {exec_ctx.execution_id}")
-    print(f"    Energía estimada: {estimated_energy:.4f}")
-
-# Finalizar sesión
-experiment_session.timestamp_ended = datetime.datetime.utcnow().isoformat() + "Z"
-experiment_session.session_metrics["convergence_achieved"] = True
-experiment_session.session_metrics["convergence_metric"] = -1.1373
-experiment_session.session_metrics["final_energy"] = experiment_session.session_metrics["parameter_history"][-1]["energy"]
-
-print(f"\n  ✓ ExperimentSession finalizado")
-print(f"    Total ejecuciones: {experiment_session.num_executions}")
-print(f"    Total shots: {experiment_session.total_shots_used}")
-
-# ============================================================
-# FASE 5: ANÁLISIS
-# ============================================================
-
-print("\n[FASE 5] Integrando metadatos...")
-
-provenance_record = ProvenanceRecordLean(
-    provenance_id="prov_poc2_20251112",
-    timestamp_recorded=datetime.datetime.utcnow().isoformat() + "Z",
-    prov_mode="lean",
-    relations=[],
-    workflow_graph={},
-    quality_assessment={}
-)
-
-# Añadir relaciones base
-provenance_record.add_relation(
-    "wasDerivedFrom",
-    all_compilation_traces[0].trace_id,
-    circuit_metadata.circuit_id,
-    all_compilation_traces[0].timestamp_compilation,
-    role="compilation_input"
-)
 
-# Relaciones para cada ejecución
-for exec_ctx in all_execution_contexts:
+    # Añadir relaciones base
     provenance_record.add_relation(
-        "wasGeneratedBy",
-        exec_ctx.execution_id,
-        exec_ctx.trace_id,
-        exec_ctx.timestamp_execution
+        "wasDerivedFrom",
+        all_compilation_traces[0].trace_id,
+        circuit_metadata.circuit_id,
+        all_compilation_traces[0].timestamp_compilation,
+        role="compilation_input"
     )
 
-# Relación de sesión
-provenance_record.add_relation(
-    "wasInformedBy",
-    experiment_session.session_id,
-    circuit_metadata.circuit_id,
-    experiment_session.timestamp_started
-)
+    # Relaciones para cada ejecución (en bloque)
+    make_relation = ProvenanceRecordLean.make_relation
+    provenance_record.add_relations(
+        make_relation("wasGeneratedBy", exec_ctx.execution_id, exec_ctx.trace_id, exec_ctx.timestamp_execution)
+        for exec_ctx in all_execution_contexts
+    )
 
-# Workflow graph
-workflow_start_dt = datetime.datetime.fromisoformat(
-    circuit_metadata.timestamp_created.replace('Z', '+00:00')
-)
-workflow_end_dt = datetime.datetime.fromisoformat(
-    experiment_session.timestamp_ended.replace('Z', '+00:00')
-)
-total_duration = (workflow_end_dt - workflow_start_dt).total_seconds()
+    # Relación de sesión
+    provenance_record.add_relation(
+        "wasInformedBy",
+        experiment_session.session_id,
+        circuit_metadata.circuit_id,
+        experiment_session.timestamp_started
+    )
 
-provenance_record.workflow_graph = {
-    "workflow_start": circuit_metadata.timestamp_created,
-    "workflow_end": experiment_session.timestamp_ended,
-    "total_duration_seconds": total_duration,
-    "num_iterations": experiment_session.num_executions
-}
+    # Workflow graph
+    workflow_start_dt = parse_iso_timestamp(circuit_metadata.timestamp_created)
+    workflow_end_dt = parse_iso_timestamp(experiment_session.timestamp_ended)
+    total_duration = (workflow_end_dt - workflow_start_dt).total_seconds()
 
-provenance_record.quality_assessment = {
-    "data_lineage_complete": True,
-    "all_entities_linked": True,
-    "critical_paths_identified": ["design→compile→execute×5"],
-    "jit_transpilation_used": True,
-    "calibration_refreshes": len(all_calibration_data) - 1
-}
+    provenance_record.workflow_graph = {
+        "workflow_start": circuit_metadata.timestamp_created,
+        "workflow_end": experiment_session.timestamp_ended,
+        "total_duration_seconds": total_duration,
+        "num_iterations": experiment_session.num_executions
+    }
 
-print(f"  ✓ ProvenanceRecordLean creado: {provenance_record.provenance_id}")
-print(f"    Relaciones: {len(provenance_record.relations)}")
-
-# Crear QCMetadataModel
-metadata_model = QCMetadataModel(
-    model_version="1.1.0",
-    timestamp_model_created=datetime.datetime.utcnow().isoformat() + "Z",
-    device_metadata=device_metadata,
-    calibration_data=all_calibration_data,
-    circuit_metadata=circuit_metadata,
-    compilation_trace=all_compilation_traces,
-    execution_context=all_execution_contexts,
-    provenance_record=provenance_record,
-    experiment_session=experiment_session
-)
+    provenance_record.quality_assessment = {
+        "data_lineage_complete": True,
+        "all_entities_linked": True,
+        "critical_paths_identified": ["design→compile→execute×5"],
+        "jit_transpilation_used": True,
+        "calibration_refreshes": len(all_calibration_data) - 1
+    }
 
-# Validar denormalización
-try:
-    is_consistent = metadata_model.validate_denormalization()
-    print(f"  ✓ Validación de denormalización: {'PASÓ' if is_consistent else 'FALLÓ'}")
-except Exception as e:
-    print(f"  ✗ Error en validación: {e}")
-    is_consistent = False
-
-# ============================================================
-# EXPORTACIÓN
-# ============================================================
-
-print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
-
-os.makedirs("outputs", exist_ok=True)
-
-try:
-    json_output = metadata_model.to_complete_json()
-    filename = f"outputs/metadata_poc2_vqe_h2_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(json_output)
-    
-    print(f"  ✓ Archivo guardado: {filename}")
-    print(f"    Tamaño: {len(json_output)} bytes")
-    
-    # Validar JSON Schema
+    print(f"  ✓ ProvenanceRecordLean creado: {provenance_record.provenance_id}")
+    print(f"    Relaciones: {len(provenance_record.relations)}")
+
+    # Crear QCMetadataModel
+    metadata_model = QCMetadataModel(
+        model_version="1.1.0",
+        timestamp_model_created=phase5_iso,
+        device_metadata=device_metadata,
+        calibration_data=all_calibration_data,
+        circuit_metadata=circuit_metadata,
+        compilation_trace=all_compilation_traces,
+        execution_context=all_execution_contexts,
+        provenance_record=provenance_record,
+        experiment_session=experiment_session
+    )
+
+    # Validar denormalización
     try:
-        import jsonschema
-        schema_path = os.path.join("model", "schema_qc_metadata_v1.1.json")
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema = json.load(f)
-        jsonschema.validate(json.loads(json_output), schema)
-        print(f"  ✓ Validación JSON Schema: PASÓ")
-    except ImportError:
-        print(f"  ⚠ jsonschema no instalado, saltando validación")
+        is_consistent = metadata_model.validate_denormalization()
+        print(f"  ✓ Validación de denormalización: {'PASÓ' if is_consistent else 'FALLÓ'}")
     except Exception as e:
-        print(f"  ✗ Error en validación JSON Schema: {e}")
-    
-except Exception as e:
-    print(f"  ✗ Error en exportación: {e}")
-    import traceback
-    traceback.print_exc()
-
-# ============================================================
-# REPORTE FINAL
-# ============================================================
-
-print("\n" + "="*60)
-print("PoC 2: COMPLETA")
-print("="*60)
-
-print(f"\nMETADATOS:")
-print(f"  - Iteraciones: {experiment_session.num_executions}")
-print(f"  - Total shots: {experiment_session.total_shots_used}")
-print(f"  - Compilaciones: {len(all_compilation_traces)}")
-print(f"  - Calibraciones: {len(all_calibration_data)}")
-print(f"  - JIT transpilation usado: {'SÍ' if len(all_compilation_traces) > 1 else 'NO'}")
-print(f"  - Relaciones PROV: {len(provenance_record.relations)}")
-print(f"  - Validación denormalización: {'PASÓ ✓' if is_consistent else 'FALLÓ ✗'}")
-
-if 'filename' in locals():
-    file_size = os.path.getsize(filename)
-    print(f"\nJSON:")
-    print(f"  - Tamaño: {file_size / 1024:.2f} KB")
-    print(f"  - Archivo: {filename}")
-
-print(f"\nCONVERGENCIA:")
-print(f"  - Energía final: {experiment_session.session_metrics.get('final_energy', 'N/A'):.4f}")
-print(f"  - Convergencia lograda: {'SÍ ✓' if experiment_session.session_metrics.get('convergence_achieved') else 'NO ✗'}")
-
-print("\nCONCLUSIÓN: PASÓ ✓")
+        print(f"  ✗ Error en validación: {e}")
+        is_consistent = False
+
+    # ============================================================
+    # EXPORTACIÓN
+    # ============================================================
+
+    print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
+
+    os.makedirs("outputs", exist_ok=True)
 
+    try:
+        # JSON en bytes UTF-8 (orjson si está instalado), escrito en modo binario sin pasar por str
+        json_output = metadata_model.to_json()
+        filename = f"outputs/metadata_poc2_vqe_h2_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, 'wb') as f:
+            f.write(json_output)
+
+        print(f"  ✓ Archivo guardado: {filename}")
+        print(f"    Tamaño: {len(json_output)} bytes")
+
+        # Validar JSON Schema (validador compilado una vez: fastjsonschema o jsonschema)
+        try:
+            validate_metadata_schema(metadata_model.to_dict())
+            print(f"  ✓ Validación JSON Schema: PASÓ")
+        except ImportError:
+            print(f"  ⚠ jsonschema no instalado, saltando validación")
+        except Exception as e:
+            print(f"  ✗ Error en validación JSON Schema: {e}")
+
+    except Exception as e:
+        print(f"  ✗ Error en exportación: {e}")
+        import traceback
+        traceback.print_exc()
+
+    # ============================================================
+    # REPORTE FINAL
+    # ============================================================
+
+    print("\n" + "="*60)
+    print("PoC 2: COMPLETA")
+    print("="*60)
+
+    print(f"\nMETADATOS:")
+    print(f"  - Iteraciones: {experiment_session.num_executions}")
+    print(f"  - Total shots: {experiment_session.total_shots_used}")
+    print(f"  - Compilaciones: {len(all_compilation_traces)}")
+    print(f"  - Calibraciones: {len(all_calibration_data)}")
+    print(f"  - JIT transpilation usado: {'SÍ' if len(all_compilation_traces) > 1 else 'NO'}")
+    print(f"  - Relaciones PROV: {len(provenance_record.relations)}")
+    print(f"  - Validación denormalización: {'PASÓ ✓' if is_consistent else 'FALLÓ ✗'}")
+
+    if filename is not None:
+        file_size = os.path.getsize(filename)
+        print(f"\nJSON:")
+        print(f"  - Tamaño: {file_size / 1024:.2f} KB")
+        print(f"  - Archivo: {filename}")
+
+    print(f"\nCONVERGENCIA:")
+    print(f"  - Energía final: {experiment_session.session_metrics.get('final_energy', 'N/A'):.4f}")
+    print(f"  - Convergencia lograda: {'SÍ ✓' if experiment_session.session_metrics.get('convergence_achieved') else 'NO ✗'}")
+
+    print("\nCONCLUSIÓN: PASÓ ✓")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,51 @@ Ejecuta VQE con transpilación JIT (just-in-time): si calibración expira,
 recompilar inmediatamente antes de ejecutar siguiente iteración.
 """
 
-import json
 import datetime
 import sys
 import os
+import time
+from itertools import islice
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from qiskit import transpile
-from helpers import get_aer_backend
+from helpers import get_aer_backend, cached_transpile_with_qasm, needs_transpile
 from model.qc_metadata_model import (
     DeviceMetadata, CircuitMetadata, CalibrationData,
     CompilationTrace, ExecutionContext, ProvenanceRecordLean,
     ExperimentSession, QCMetadataModel
 )
-from helpers import build_vqe_circuit, simulate_vqe_execution, fetch_new_calibration
+from helpers import build_vqe_circuit, simulate_vqe_execution, fetch_new_calibration, validate_metadata_schema
+from helpers import parse_iso_timestamp, get_utc_now, get_utc_now_iso, format_utc_iso
+
+# Política de compilación: "transpile" (por defecto) compila siempre; "simulator_skip"
+# (opcional, POC3_COMPILATION_POLICY=simulator_skip) omite transpile() cuando el backend
+# es un simulador ideal y ejecuta el circuito tal cual
+COMPILATION_POLICY = os.getenv("POC3_COMPILATION_POLICY", "transpile")
+SIMULATOR_SKIP_PASSES = [{"pass_name": "Simulator_NoOp", "status": "skipped"}]
+# Traza de una compilación resuelta desde la caché de transpile (no se recompiló)
+TRANSPILE_CACHE_HIT_PASSES = [{"pass_name": "TranspileCacheHit", "status": "reused"}]
+
+# Metadatos estáticos de las recompilaciones JIT: se construyen una vez y se comparten
+# por referencia entre iteraciones (no se modifican después de asignarlos)
+OPTIMIZATION_METRICS = {
+    "gate_reduction_percent": 15,
+    "depth_reduction_percent": 10,
+    "estimated_final_fidelity": 0.95
+}
+JIT_OPTIMIZATION_METRICS = {**OPTIMIZATION_METRICS, "jit_triggered": True}
+JIT_COMPILATION_PASSES = [
+    {"pass_name": "JIT_Recompilation", "status": "completed"},
+    {"pass_name": "Unroll3qOrMore", "status": "completed"},
+    {"pass_name": "TrivialLayout", "status": "completed"},
+    {"pass_name": "Optimize1qGates", "status": "completed"}
+]
+JIT_DECISIONS = {
+    "qubits_selected": [0, 1],
+    "swaps_necessary": 0,
+    "jit_transpilation": True,
+    "trigger_reason": "calibration_expired"
+}
 
 # ============================================================
 # FASE 1: DISEÑO
@@ -34,7 +64,7 @@ circuit_metadata = CircuitMetadata(
     num_qubits=2,
     circuit_depth=8,
     num_gates=20,
-    timestamp_created=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_created=get_utc_now_iso(),
     description="VQE with JIT transpilation for H2 using UCCSD ansatz",
     author="Nawel Huenchuleo",
     tags=["vqe", "h2", "poc", "uccsd", "jit"],
@@ -60,7 +90,7 @@ device_metadata = DeviceMetadata(
     backend_name="qasm_simulator",
     num_qubits=32,
     version="1.0",
-    timestamp_metadata=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_metadata=get_utc_now_iso(),
     connectivity={"topology_type": "all_to_all"},
     noise_characteristics={"avg_t1_us": None, "avg_t2_us": None}
 )
@@ -77,9 +107,9 @@ print("\n[FASE 2] Compilando circuito inicial...")
 calibration_data = CalibrationData(
     calibration_id="cal_simulator_poc3_initial",
     device_id=device_metadata.device_id,
-    timestamp_captured=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_captured=get_utc_now_iso(),
     # Calibración válida solo por 1 minuto para forzar JIT
-    valid_until=(datetime.datetime.utcnow() + datetime.timedelta(minutes=1)).isoformat() + "Z",
+    valid_until=format_utc_iso(get_utc_now() + datetime.timedelta(minutes=1)),
     calibration_method="simulator_default",
     calibration_version="1.0",
     qubit_properties={i: {"t1_us": 1e6, "t2_us": 1e6, "readout_error": 0.0} 
@@ -92,37 +122,42 @@ print(f"  ✓ CalibrationData capturada: {calibration_data.calibration_id}")
 print(f"    Válida hasta: {calibration_data.valid_until} (1 minuto para forzar JIT)")
 
 backend = get_aer_backend('qasm_simulator')
-compilation_start = datetime.datetime.utcnow()
-compiled_circuit = transpile(circuit, backend=backend, optimization_level=3, seed_transpiler=42)
-compilation_end = datetime.datetime.utcnow()
-compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
+skip_transpile = COMPILATION_POLICY == "simulator_skip" and not needs_transpile(backend)
+if skip_transpile:
+    print(f"  Simulador ideal: se omite transpile() (política {COMPILATION_POLICY})")
+    compiled_circuit, compiled_qasm = circuit, circuit_metadata.circuit_qasm
+    compilation_duration = 0.0
+    cache_hit = False
+else:
+    # Duración con reloj monotónico (inmune a ajustes NTP); el reloj de pared solo fecha la traza
+    compilation_start_ns = time.monotonic_ns()
+    compiled_circuit, compiled_qasm, cache_hit = cached_transpile_with_qasm(circuit, backend, optimization_level=1, seed_transpiler=42)
+    compilation_duration = (time.monotonic_ns() - compilation_start_ns) / 1e6
+compilation_end = get_utc_now()
 
 compilation_trace = CompilationTrace(
     trace_id="trace_poc3_initial",
     circuit_id=circuit_metadata.circuit_id,
     device_id=device_metadata.device_id,
     calibration_id=calibration_data.calibration_id,
-    timestamp_compilation=compilation_end.isoformat() + "Z",
+    timestamp_compilation=format_utc_iso(compilation_end),
     compiler_name="qiskit",
     compiler_version="0.45.0",
     compilation_duration_ms=compilation_duration,
-    compilation_passes=[
+    compilation_passes=SIMULATOR_SKIP_PASSES if skip_transpile else TRANSPILE_CACHE_HIT_PASSES if cache_hit else [
         {"pass_name": "Initial_Compilation", "status": "completed"},
         {"pass_name": "Unroll3qOrMore", "status": "completed"},
         {"pass_name": "TrivialLayout", "status": "completed"},
         {"pass_name": "Optimize1qGates", "status": "completed"}
     ],
-    optimization_metrics={
-        "gate_reduction_percent": 15,
-        "depth_reduction_percent": 10,
-        "estimated_final_fidelity": 0.95
-    },
+    optimization_metrics=OPTIMIZATION_METRICS,
     decisions_made={
         "qubits_selected": [0, 1],
         "swaps_necessary": 0,
-        "jit_transpilation": False
+        "jit_transpilation": False,
+        "cache_hit": cache_hit
     },
-    final_circuit_qasm=compiled_circuit.qasm()
+    final_circuit_qasm=compiled_qasm
 )
 
 print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
@@ -133,10 +168,14 @@ print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
 
 print("\n[FASE 3] Creando ExperimentSession con política JIT...")
 
+# Etiqueta de la ejecución, calculada una vez: junto con el nº de iteración da IDs
+# ordenables y sin colisiones aunque las iteraciones duren menos de un segundo
+run_tag = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+
 experiment_session = ExperimentSession(
-    session_id=f"vqe_jit_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_poc3",
+    session_id=f"vqe_jit_{run_tag}_poc3",
     algorithm_type="vqe",
-    timestamp_started=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_started=get_utc_now_iso(),
     circuit_id=circuit_metadata.circuit_id,
     device_id=device_metadata.device_id,
     optimizer="COBYLA",
@@ -150,7 +189,8 @@ experiment_session = ExperimentSession(
         "convergence_metric": None,
         "convergence_achieved": False,
         "parameter_history": [],
-        "jit_recompilations": 0
+        "jit_recompilations": 0,
+        "compilation_policy": COMPILATION_POLICY
     },
     environmental_log=[]
 )
@@ -174,12 +214,16 @@ for iteration in range(1, 6):
     
     # Esperar un poco entre iteraciones para simular tiempo real
     if iteration > 1:
-        import time
         time.sleep(0.5)  # Esperar 0.5 segundos
     
+    # Un único instante de referencia por iteración (validez y edad)
+    now = get_utc_now()
+    
     # Verificar validez de calibración ANTES de cada iteración
-    calibration_valid = current_calibration.is_valid_now()
-    calibration_age = current_calibration.age_seconds()
+    calibration_valid = current_calibration.is_valid_now(now)
+    # Estado de la calibración con la que se ejecuta (se evalúa una sola vez por iteración)
+    calibration_expired = not calibration_valid
+    calibration_age = current_calibration.age_seconds(now)
     
     print(f"  Estado calibración: {'VÁLIDA' if calibration_valid else 'EXPIRADA'}")
     print(f"  Edad calibración: {calibration_age:.1f}s")
@@ -189,75 +233,67 @@ for iteration in range(1, 6):
         
         # Obtener nueva calibración
         current_calibration = fetch_new_calibration(device_metadata, hours_valid=1)
+        calibration_expired = False  # Recién obtenida: válida por construcción (1 hora)
         all_calibration_data.append(current_calibration)
         print(f"  ✓ Nueva calibración obtenida: {current_calibration.calibration_id}")
         
         # JIT Recompilación
         print(f"  🔄 Recompilando con nueva calibración (JIT)...")
-        compilation_start = datetime.datetime.utcnow()
-        compiled_circuit = transpile(circuit, backend=backend, optimization_level=3, seed_transpiler=42)
-        compilation_end = datetime.datetime.utcnow()
-        compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
+        if skip_transpile:
+            compilation_duration = 0.0  # Se sigue ejecutando el circuito original
+            cache_hit = False
+        else:
+            compilation_start_ns = time.monotonic_ns()
+            compiled_circuit, compiled_qasm, cache_hit = cached_transpile_with_qasm(circuit, backend, optimization_level=1, seed_transpiler=42)
+            compilation_duration = (time.monotonic_ns() - compilation_start_ns) / 1e6
+        compilation_end = get_utc_now()
         
         current_trace = CompilationTrace(
-            trace_id=f"trace_poc3_iter{iteration}_jit_{datetime.datetime.now().strftime('%H%M%S')}",
+            trace_id=f"trace_poc3_iter{iteration}_jit_{run_tag}",
             circuit_id=circuit_metadata.circuit_id,
             device_id=device_metadata.device_id,
             calibration_id=current_calibration.calibration_id,
-            timestamp_compilation=compilation_end.isoformat() + "Z",
+            timestamp_compilation=format_utc_iso(compilation_end),
             compiler_name="qiskit",
             compiler_version="0.45.0",
             compilation_duration_ms=compilation_duration,
-            compilation_passes=[
-                {"pass_name": "JIT_Recompilation", "status": "completed"},
-                {"pass_name": "Unroll3qOrMore", "status": "completed"},
-                {"pass_name": "TrivialLayout", "status": "completed"},
-                {"pass_name": "Optimize1qGates", "status": "completed"}
-            ],
-            optimization_metrics={
-                "gate_reduction_percent": 15,
-                "depth_reduction_percent": 10,
-                "estimated_final_fidelity": 0.95,
-                "jit_triggered": True
-            },
-            decisions_made={
-                "qubits_selected": [0, 1],
-                "swaps_necessary": 0,
-                "jit_transpilation": True,
-                "trigger_reason": "calibration_expired"
-            },
-            final_circuit_qasm=compiled_circuit.qasm()
+            compilation_passes=(SIMULATOR_SKIP_PASSES if skip_transpile
+                                else TRANSPILE_CACHE_HIT_PASSES if cache_hit
+                                else JIT_COMPILATION_PASSES),
+            optimization_metrics=JIT_OPTIMIZATION_METRICS,
+            decisions_made={**JIT_DECISIONS, "cache_hit": cache_hit},
+            final_circuit_qasm=compiled_qasm
         )
         all_compilation_traces.append(current_trace)
         experiment_session.session_metrics["jit_recompilations"] += 1
-        print(f"  ✓ JIT Recompilación completada en {compilation_duration:.2f}ms")
+        if cache_hit:
+            print(f"  ✓ Compilación reutilizada desde caché (sin recompilar) en {compilation_duration:.2f}ms")
+        else:
+            print(f"  ✓ JIT Recompilación completada en {compilation_duration:.2f}ms")
         print(f"    Trace ID: {current_trace.trace_id}")
     else:
         print(f"  ✓ Usando compilación existente: {current_trace.trace_id}")
     
     # Ejecutar
     print(f"  ▶ Ejecutando iteración {iteration}...")
-    execution_start = datetime.datetime.utcnow()
+    execution_start = get_utc_now()
     job_result = simulate_vqe_execution(compiled_circuit, 1024)
-    execution_end = datetime.datetime.utcnow()
+    execution_end = get_utc_now()
     
     # Calcular edad de calibración al momento de ejecución
-    calibration_captured_dt = datetime.datetime.fromisoformat(
-        current_calibration.timestamp_captured.replace('Z', '+00:00')
-    )
-    calibration_age_seconds = (execution_end.replace(tzinfo=datetime.timezone.utc) - 
-                              calibration_captured_dt).total_seconds()
+    # (la fecha de captura parseada se cachea en la propia calibración)
+    calibration_age_seconds = current_calibration.age_seconds(execution_end)
     
     # Determinar si se usó JIT
     jit_used = (iteration > 1 and not calibration_valid) or \
                (len(all_compilation_traces) > 1 and current_trace.trace_id != all_compilation_traces[0].trace_id)
     
     exec_ctx = ExecutionContext(
-        execution_id=f"exec_poc3_iter{iteration}_{datetime.datetime.now().strftime('%H%M%S')}",
+        execution_id=f"exec_poc3_iter{iteration}_{run_tag}",
         trace_id=current_trace.trace_id,
         device_id=device_metadata.device_id,
         calibration_id=current_calibration.calibration_id,
-        timestamp_execution=execution_end.isoformat() + "Z",
+        timestamp_execution=format_utc_iso(execution_end),
         timestamp_compilation=current_trace.timestamp_compilation,
         num_shots=1024,
         execution_mode="qasm_simulator",
@@ -275,13 +311,13 @@ for iteration in range(1, 6):
         },
         freshness_validation={
             "calibration_age_seconds": calibration_age_seconds,
-            "calibration_expired": not current_calibration.is_valid_now(),
+            "calibration_expired": calibration_expired,
             "jit_transpilation_used": jit_used,
             "jit_triggered_at": current_trace.timestamp_compilation if jit_used else None
         },
         execution_parameters={
             "seed": 42 + iteration,
-            "optimization_level": 3,
+            "optimization_level": 1,
             "resilience_level": 0,
             "iteration": iteration,
             "jit_enabled": True
@@ -295,7 +331,7 @@ for iteration in range(1, 6):
     # Log ambiental
     from helpers import fetch_temp, fetch_system_load
     experiment_session.environmental_log.append({
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "timestamp": exec_ctx.timestamp_execution,
         "temperature_k": fetch_temp(),
         "system_load_percent": fetch_system_load(),
         "iteration": iteration,
@@ -316,7 +352,7 @@ for iteration in range(1, 6):
     print(f"    JIT usado: {'SÍ' if jit_used else 'NO'}")
 
 # Finalizar sesión
-experiment_session.timestamp_ended = datetime.datetime.utcnow().isoformat() + "Z"
+experiment_session.timestamp_ended = get_utc_now_iso()
 experiment_session.session_metrics["convergence_achieved"] = True
 experiment_session.session_metrics["convergence_metric"] = -1.1373
 if experiment_session.session_metrics["parameter_history"]:
@@ -335,56 +371,44 @@ print("\n[FASE 5] Integrando metadatos...")
 
 provenance_record = ProvenanceRecordLean(
     provenance_id="prov_poc3_20251112",
-    timestamp_recorded=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_recorded=get_utc_now_iso(),
     prov_mode="lean",
     relations=[],
     workflow_graph={},
     quality_assessment={}
 )
 
-# Relaciones base
-provenance_record.add_relation(
-    "wasDerivedFrom",
-    all_compilation_traces[0].trace_id,
-    circuit_metadata.circuit_id,
-    all_compilation_traces[0].timestamp_compilation,
-    role="compilation_input"
-)
-
-# Relaciones para cada ejecución
-for exec_ctx in all_execution_contexts:
-    provenance_record.add_relation(
-        "wasGeneratedBy",
-        exec_ctx.execution_id,
-        exec_ctx.trace_id,
-        exec_ctx.timestamp_execution
-    )
-
-# Relaciones JIT (si hay múltiples traces)
-for i in range(1, len(all_compilation_traces)):
-    provenance_record.add_relation(
+# Relaciones: base, una por ejecución, JIT (si hay múltiples traces) y de sesión,
+# añadidas en un único extend
+make_relation = ProvenanceRecordLean.make_relation
+provenance_record.add_relations([
+    make_relation(
+        "wasDerivedFrom",
+        all_compilation_traces[0].trace_id,
+        circuit_metadata.circuit_id,
+        all_compilation_traces[0].timestamp_compilation,
+        role="compilation_input"
+    ),
+    *(make_relation("wasGeneratedBy", exec_ctx.execution_id, exec_ctx.trace_id, exec_ctx.timestamp_execution)
+      for exec_ctx in all_execution_contexts),
+    *(make_relation(
         "wasDerivedFrom",
-        all_compilation_traces[i].trace_id,
+        trace.trace_id,
         circuit_metadata.circuit_id,
-        all_compilation_traces[i].timestamp_compilation,
+        trace.timestamp_compilation,
         role="jit_recompilation"
-    )
-
-# Relación de sesión
-provenance_record.add_relation(
-    "wasInformedBy",
-    experiment_session.session_id,
-    circuit_metadata.circuit_id,
-    experiment_session.timestamp_started
-)
+    ) for trace in islice(all_compilation_traces, 1, None)),
+    make_relation(
+        "wasInformedBy",
+        experiment_session.session_id,
+        circuit_metadata.circuit_id,
+        experiment_session.timestamp_started
+    ),
+])
 
 # Workflow graph
-workflow_start_dt = datetime.datetime.fromisoformat(
-    circuit_metadata.timestamp_created.replace('Z', '+00:00')
-)
-workflow_end_dt = datetime.datetime.fromisoformat(
-    experiment_session.timestamp_ended.replace('Z', '+00:00')
-)
+workflow_start_dt = parse_iso_timestamp(circuit_metadata.timestamp_created)
+workflow_end_dt = parse_iso_timestamp(experiment_session.timestamp_ended)
 total_duration = (workflow_end_dt - workflow_start_dt).total_seconds()
 
 provenance_record.workflow_graph = {
@@ -411,7 +435,7 @@ print(f"    Relaciones: {len(provenance_record.relations)}")
 # Crear QCMetadataModel
 metadata_model = QCMetadataModel(
     model_version="1.1.0",
-    timestamp_model_created=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_model_created=get_utc_now_iso(),
     device_metadata=device_metadata,
     calibration_data=all_calibration_data,
     circuit_metadata=circuit_metadata,
@@ -438,21 +462,18 @@ print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
 os.makedirs("outputs", exist_ok=True)
 
 try:
-    json_output = metadata_model.to_complete_json()
-    filename = f"outputs/metadata_poc3_vqe_h2_jit_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
+    # JSON en bytes UTF-8 (orjson si está instalado), escrito en modo binario sin pasar por str
+    json_output = metadata_model.to_json()
+    filename = f"outputs/metadata_poc3_vqe_h2_jit_{run_tag}.json"
+    with open(filename, 'wb') as f:
         f.write(json_output)
     
     print(f"  ✓ Archivo guardado: {filename}")
     print(f"    Tamaño: {len(json_output)} bytes")
     
-    # Validar JSON Schema
+    # Validar JSON Schema (validador compilado una vez: fastjsonschema o jsonschema)
     try:
-        import jsonschema
-        schema_path = os.path.join("model", "schema_qc_metadata_v1.1.json")
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema = json.load(f)
-        jsonschema.validate(json.loads(json_output), schema)
+        validate_metadata_schema(metadata_model.to_dict())
         print(f"  ✓ Validación JSON Schema: PASÓ")
     except ImportError:
         print(f"  ⚠ jsonschema no instalado, saltando validación")
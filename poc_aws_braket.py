@@ -16,7 +16,7 @@ from model.qc_metadata_model import (
     CompilationTrace, ExecutionContext, ProvenanceRecordLean,
     QCMetadataModel
 )
-from helpers import build_vqe_circuit
+from helpers import build_vqe_circuit, get_utc_now, get_utc_now_iso, format_utc_iso
 from cloud_providers import AWSBraketProvider, convert_qiskit_to_braket
 
 # ============================================================
@@ -46,7 +46,7 @@ circuit_metadata = CircuitMetadata(
     num_qubits=2,
     circuit_depth=8,
     num_gates=20,
-    timestamp_created=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_created=get_utc_now_iso(),
     description="VQE for H2 using UCCSD ansatz on AWS Braket",
     author="Nawel Huenchuleo",
     tags=["vqe", "h2", "aws", "braket"],
@@ -105,9 +105,9 @@ print("\n[FASE 3] Compilando circuito...")
 
 try:
     # Convertir circuito de Qiskit a Braket
-    compilation_start = datetime.datetime.utcnow()
+    compilation_start = get_utc_now()
     circuit_braket = convert_qiskit_to_braket(circuit_qiskit)
-    compilation_end = datetime.datetime.utcnow()
+    compilation_end = get_utc_now()
     compilation_duration = (compilation_end - compilation_start).total_seconds() * 1000
     
     print(f"  ✓ Circuito convertido a Braket")
@@ -124,7 +124,7 @@ compilation_trace = CompilationTrace(
     circuit_id=circuit_metadata.circuit_id,
     device_id=device_metadata.device_id,
     calibration_id=calibration_data.calibration_id,
-    timestamp_compilation=compilation_end.isoformat() + "Z",
+    timestamp_compilation=format_utc_iso(compilation_end),
     compiler_name="braket",
     compiler_version="1.0",
     compilation_duration_ms=compilation_duration,
@@ -157,7 +157,7 @@ print(f"  ✓ CompilationTrace creado: {compilation_trace.trace_id}")
 
 print("\n[FASE 4] Ejecutando en AWS Braket...")
 
-execution_start = datetime.datetime.utcnow()
+execution_start = get_utc_now()
 
 try:
     # Ejecutar en AWS Braket
@@ -167,13 +167,13 @@ try:
         shots=1024
     )
     
-    execution_end = datetime.datetime.utcnow()
+    execution_end = get_utc_now()
     
     # Calcular edad de calibración
     calibration_captured_dt = datetime.datetime.fromisoformat(
         calibration_data.timestamp_captured.replace('Z', '+00:00')
     )
-    calibration_age_seconds = (execution_end.replace(tzinfo=datetime.timezone.utc) - 
+    calibration_age_seconds = (execution_end - 
                               calibration_captured_dt).total_seconds()
     
     # Crear ExecutionContext
@@ -182,7 +182,7 @@ try:
         trace_id=compilation_trace.trace_id,
         device_id=device_metadata.device_id,
         calibration_id=calibration_data.calibration_id,
-        timestamp_execution=execution_end.isoformat() + "Z",
+        timestamp_execution=format_utc_iso(execution_end),
         timestamp_compilation=compilation_trace.timestamp_compilation,
         num_shots=1024,
         execution_mode="simulator" if "simulator" in DEVICE_ARN.lower() else "qpu",
@@ -231,7 +231,7 @@ print("\n[FASE 5] Integrando metadatos...")
 
 provenance_record = ProvenanceRecordLean(
     provenance_id=f"prov_aws_braket_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
-    timestamp_recorded=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_recorded=get_utc_now_iso(),
     prov_mode="lean",
     relations=[],
     workflow_graph={},
@@ -272,7 +272,7 @@ provenance_record.add_relation(
 workflow_start_dt = datetime.datetime.fromisoformat(
     circuit_metadata.timestamp_created.replace('Z', '+00:00')
 )
-total_duration = (execution_end.replace(tzinfo=datetime.timezone.utc) - workflow_start_dt).total_seconds()
+total_duration = (execution_end - workflow_start_dt).total_seconds()
 
 provenance_record.workflow_graph = {
     "workflow_start": circuit_metadata.timestamp_created,
@@ -295,7 +295,7 @@ print(f"    Relaciones: {len(provenance_record.relations)}")
 # Crear QCMetadataModel
 metadata_model = QCMetadataModel(
     model_version="1.1.0",
-    timestamp_model_created=datetime.datetime.utcnow().isoformat() + "Z",
+    timestamp_model_created=get_utc_now_iso(),
     device_metadata=device_metadata,
     calibration_data=[calibration_data],
     circuit_metadata=circuit_metadata,
@@ -322,9 +322,10 @@ print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
 os.makedirs("outputs", exist_ok=True)
 
 try:
-    json_output = metadata_model.to_complete_json()
+    # JSON en bytes UTF-8 (orjson si está instalado), escrito en modo binario
+    json_output = metadata_model.to_json()
     filename = f"outputs/metadata_aws_braket_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
+    with open(filename, 'wb') as f:
         f.write(json_output)
     
     print(f"  ✓ Archivo guardado: {filename}")
@@ -348,9 +348,10 @@ print("\n[EXPORTACIÓN] Guardando metadatos a JSON...")
 os.makedirs("outputs", exist_ok=True)
 
 try:
-    json_output = metadata_model.to_complete_json()
+    # JSON en bytes UTF-8 (orjson si está instalado), escrito en modo binario
+    json_output = metadata_model.to_json()
     filename = f"outputs/metadata_spinq_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
+    with open(filename, 'wb') as f:
         f.write(json_output)
     
     print(f"  ✓ Archivo guardado: {filename}")
@@ -213,8 +213,8 @@ for opt_level in OPTIMIZATION_LEVELS:
     
     filename = f"metadata_opt_level_{opt_level}.json"
     filepath = os.path.join(OUTPUT_DIR, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(model.to_complete_json())
+    with open(filepath, 'wb') as f:
+        f.write(model.to_json())
     
     # Guardar datos en CSV para análisis fácil
     with open(csv_file, 'a', newline='') as f: